@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Command Line
+
+Compiles image sets without the GUI, from one or more run manifests.
+A manifest is a JSON (or, if PyYAML is installed, YAML) file holding
+a single run, a list of runs or {"defaults": {...}, "runs": [...]},
+where the defaults are applied to every run. A run holds:
+
+    additive        glob or list of globs of the additive images
+    subtractive     glob or list of globs of the subtractive images
+    multiplicative  path of the multiplicative correction image
+    rotation        {"additive": 0, "subtractive": 0, "multiplicative": 0}
+                    clockwise quarter turns of each image
+    cycles          number of cycles the images are divided into
+    drop_first      images dropped at the start of each cycle
+    drop_last       images dropped at the end of each cycle
+    std_bounds      {"additive": [4, 4], "subtractive": [4, 4]}
+                    accepted standard deviations below and above
+                    the average normalization
+    output          {"folder": ".", "name": "Compiled", "total": true,
+                     "cycles": false, "singles": false}
+
+Relative paths are relative to the manifest. The images are loaded,
+bounded and compiled exactly as in the GUI, PySide6 is not imported.
+
+    python Image_Compiler_CLI.py run.json [more.json ...] [-j THREADS] [-p PROCESSES]
+
+With -p the images are compiled on a pool of processes, each
+accumulating into shared memory, rather than on the reading threads.
+
+A run can be split into shards compiled by separate processes or
+machines sharing a file system. With --shard K/N only shard K of N
+is compiled and its partial result saved next to the output, the
+partial results of every shard are then merged into the total and
+cycle images of the run:
+
+    python Image_Compiler_CLI.py run.json --shard 0/2
+    python Image_Compiler_CLI.py run.json --shard 1/2
+    python Image_Compiler_CLI.py --merge Compiled_Part_*.npz [-o PATH]
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import os
+import sys
+import glob
+import json
+import argparse
+
+from multiprocessing.pool import ThreadPool as Pool
+from multiprocessing import cpu_count
+
+from src.Sets import ImageSet
+from src.Engine import imap_bounded, load_image, set_statistics, normalize_set, bound_sets, compile_sets, compile_parameters, \
+                       compile_partial, merge_partials, shard_indicies
+
+#Parameters of a run that are not given in its manifest
+DEFAULTS = {'additive': [],
+            'subtractive': [],
+            'multiplicative': None,
+            'rotation': {'additive': 0, 'subtractive': 0, 'multiplicative': 0},
+            'cycles': 1,
+            'drop_first': 0,
+            'drop_last': 0,
+            'std_bounds': {'additive': [4, 4], 'subtractive': [4, 4]},
+            'output': {'folder': '.', 'name': 'Compiled', 'total': True, 'cycles': False, 'singles': False}}
+
+def merge(defaults, run):
+    '''
+    Returns the run with the missing parameters taken from the defaults,
+    parameters holding a dictionary are merged key by key.
+    '''
+
+    merged = dict(defaults)
+
+    for key, value in run.items():
+
+        if isinstance(value, dict) == True and isinstance(merged.get(key), dict) == True:
+
+            merged[key] = dict(merged[key], **value)
+
+        else:
+
+            merged[key] = value
+
+    return merged
+
+def read_manifest(path):
+    '''
+    Returns the runs of a manifest with every parameter filled in, each
+    run records the directory of its manifest under "base".
+    '''
+
+    with open(path) as manifest_file:
+
+        if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+
+            try:
+
+                import yaml
+
+            except ImportError:
+
+                raise ValueError('PyYAML is required to read ' + path + ', use a JSON manifest instead')
+
+            manifest = yaml.safe_load(manifest_file)
+
+        else:
+
+            manifest = json.load(manifest_file)
+
+    defaults = DEFAULTS
+
+    if isinstance(manifest, dict) == True and 'runs' in manifest:
+
+        defaults = merge(DEFAULTS, manifest.get('defaults', {}))
+        manifest = manifest['runs']
+
+    if isinstance(manifest, dict) == True:
+
+        manifest = [manifest]
+
+    return [dict(merge(defaults, run), base = os.path.dirname(os.path.abspath(path))) for run in manifest]
+
+def expand(patterns, base):
+    '''
+    Returns the sorted image paths matching a glob or list of globs.
+    '''
+
+    if isinstance(patterns, str) == True:
+
+        patterns = [patterns]
+
+    names = []
+    for pattern in patterns:
+
+        matches = sorted(glob.glob(os.path.join(base, os.path.expanduser(pattern))))
+
+        if len(matches) == 0:
+
+            raise ValueError('No images match ' + pattern)
+
+        names.extend(matches)
+
+    return names
+
+def progress(label, value, maximum):
+    '''
+    Writes the progress of a step to stderr, at most once per percent.
+    '''
+
+    if value % max(1, maximum // 100) != 0 and value != maximum:
+
+        return
+
+    sys.stderr.write('\r' + label + ': ' + str(value) + '/' + str(maximum))
+
+    if value == maximum:
+
+        sys.stderr.write('\n')
+
+    sys.stderr.flush()
+
+def shard_argument(value):
+    '''
+    Parses a shard given as "K/N", shard K of N shards.
+    '''
+
+    try:
+
+        shard, shards = (int(part) for part in value.split('/'))
+
+    except ValueError:
+
+        raise argparse.ArgumentTypeError('a shard is given as K/N, eg. 0/4')
+
+    if shards < 1 or shard < 0 or shard >= shards:
+
+        raise argparse.ArgumentTypeError('shard ' + value + ' is not one of 0/' + str(shards) + ' to ' + str(shards - 1) + '/' + str(shards))
+
+    return shard, shards
+
+def run_compile(run, imap, processes = 0, shard = None, cpu_imap = None):
+    '''
+    Loads, bounds and compiles the image sets of a single run, as the
+    GUI does from the widgets, reading the images through "imap" and
+    calculating on "cpu_imap", or on "processes" processes if set. If a
+    (shard, shards) is given only that shard is compiled and its partial
+    result saved. Returns the number of compiled images.
+    '''
+
+    add_set, sub_set = ImageSet(), ImageSet()
+
+    for key, image_set in (('additive', add_set), ('subtractive', sub_set)):
+
+        if len(run[key]) != 0:
+
+            image_set.load(expand(run[key], run['base']), run['cycles'])
+
+    if len(add_set) == 0 and len(sub_set) == 0:
+
+        raise ValueError('No additive or subtractive images are given')
+
+    if len(add_set) != 0 and len(sub_set) != 0 and len(add_set) != len(sub_set):
+
+        raise ValueError('The number of imports must be the same for both additive and subtractive images')
+
+    for key, image_set in (('additive', add_set), ('subtractive', sub_set)):
+
+        if len(image_set) != 0:
+
+            normalize_set(image_set, set_statistics(image_set.names, imap, lambda value, maximum: progress('Loading ' + key + ' images', value, maximum), cpu_imap))
+
+    bound_sets(add_set, sub_set, int(run['drop_first']), int(run['drop_last']), \
+               [float(std) for std in run['std_bounds']['additive']], [float(std) for std in run['std_bounds']['subtractive']])
+
+    if add_set.accepted.any() == False and sub_set.accepted.any() == False:
+
+        raise ValueError('No images are accepted within the bounds')
+
+    mul_img, multiplicative = 1.0, None
+
+    if run['multiplicative'] is not None:
+
+        multiplicative = (os.path.abspath(os.path.join(run['base'], os.path.expanduser(run['multiplicative']))), int(run['rotation']['multiplicative']))
+        mul_img = load_image(*multiplicative)
+
+    folder = os.path.join(run['base'], os.path.expanduser(run['output']['folder']))
+    os.makedirs(folder, exist_ok = True)
+
+    if shard is not None:
+
+        add_names, sub_names, compile_norms, compile_cycles = compile_parameters(add_set, sub_set)
+
+        compile_partial(add_names, sub_names, int(run['rotation']['additive']), int(run['rotation']['subtractive']), compile_norms, compile_cycles, mul_img, \
+                        os.path.abspath(os.path.join(folder, run['output']['name'])), shard[0], shard[1], \
+                        run['output']['total'] == True, run['output']['cycles'] == True, run['output']['singles'] == True, multiplicative, \
+                        imap, lambda value, maximum: progress('Compiling ' + run['output']['name'] + ' shard ' + str(shard[0]) + '/' + str(shard[1]), value, maximum), \
+                        cpu_imap)
+
+        return len(shard_indicies(len(compile_norms), shard[0], shard[1]))
+
+    return compile_sets(add_set, sub_set, int(run['rotation']['additive']), int(run['rotation']['subtractive']), mul_img, \
+                        os.path.join(folder, run['output']['name']), run['output']['total'] == True, run['output']['cycles'] == True, run['output']['singles'] == True, \
+                        imap, lambda value, maximum: progress('Compiling ' + run['output']['name'], value, maximum), processes, cpu_imap)
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(description = 'Compiles image sets from run manifests without the GUI.')
+    parser.add_argument('manifests', nargs = '+', help = 'JSON or YAML run manifests, or with --merge the partial results of a sharded run')
+    parser.add_argument('-j', '--threads', type = int, default = int(os.environ.get('ICT_IO_THREADS', cpu_count())), \
+                        help = 'number of threads reading images (default: ICT_IO_THREADS or the number of cores)')
+    parser.add_argument('-p', '--processes', type = int, default = int(os.environ.get('ICT_COMPILE_PROCESSES', 0)), \
+                        help = 'number of processes compiling images, 0 compiles on the reading threads (default: ICT_COMPILE_PROCESSES or 0)')
+    parser.add_argument('--shard', type = shard_argument, default = None, metavar = 'K/N', \
+                        help = 'compile only shard K of N of each run and save its partial result')
+    parser.add_argument('--merge', action = 'store_true', help = 'merge the given partial results into the total and cycle images')
+    parser.add_argument('-o', '--output', default = None, help = 'path of the merged images, without extension (default: the output of the run)')
+
+    args = parser.parse_args(argv)
+
+    if args.merge == True:
+
+        try:
+
+            count = merge_partials(args.manifests, args.output, lambda value, maximum: progress('Merging partial results', value, maximum))
+            sys.stderr.write('merged ' + str(count) + ' images\n')
+
+        except (OSError, ValueError, KeyError) as error:
+
+            sys.stderr.write(str(error) + '\n')
+
+            return 1
+
+        return 0
+
+    pool = Pool(max(1, args.threads))
+    imap = lambda func, items: imap_bounded(pool, func, items, 2 * max(1, args.threads))
+
+    cpu_workers = max(1, int(os.environ.get('ICT_CPU_WORKERS', cpu_count())))
+    cpu_pool = Pool(cpu_workers)
+    cpu_imap = lambda func, items: imap_bounded(cpu_pool, func, items, 2 * cpu_workers)
+
+    failed = 0
+
+    try:
+
+        for path in args.manifests:
+
+            try:
+
+                runs = read_manifest(path)
+
+            except (OSError, ValueError) as error:
+
+                sys.stderr.write(path + ': ' + str(error) + '\n')
+                failed += 1
+
+                continue
+
+            for number, run in enumerate(runs):
+
+                try:
+
+                    count = run_compile(run, imap, max(0, args.processes), args.shard, cpu_imap)
+                    sys.stderr.write(path + ' [' + str(number) + ']: compiled ' + str(count) + ' images\n')
+
+                except Exception as error:
+
+                    sys.stderr.write(path + ' [' + str(number) + ']: ' + str(error) + '\n')
+                    failed += 1
+
+    finally:
+
+        for worker_pool in (pool, cpu_pool):
+
+            worker_pool.close()
+            worker_pool.join()
+
+    return 1 if failed != 0 else 0
+
+if __name__ == '__main__':
+
+    sys.exit(main())
@@ -40,6 +40,8 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         
         #<<<<<<<<<<<<Utility Scripts<<<<<<<<<<<<<<
         self.canvas = src.Canvas
+        self.workers = src.Workers(self)
+        self.jobs = src.Jobs(self)
         self.image = src.Image(self)
         self.plot = src.Plot(self)
         self.trace = src.Trace(self)
@@ -93,6 +95,19 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.actionAbout.triggered.connect(self.messaging.open_about_window)
         self.actionDocumentation.triggered.connect(lambda: QDesktopServices.openUrl(QUrl("https://www.AmorphousToolbox.com", QUrl.TolerantMode)))
         self.actionExit.triggered.connect(self.close)
+        self.actionPreferences.triggered.connect(self.messaging.open_preferences_window)
+
+        self.menuFile.insertAction(self.actionExit, self.actionPreferences)
+
+    #Cancels the running jobs and shuts down the application-wide
+    #worker pools on exit
+    #=============================================================
+    def closeEvent(self, event):
+
+        self.jobs.close()
+        self.workers.close()
+
+        super(MainWindow, self).closeEvent(event)
     
 if __name__ == '__main__':
 
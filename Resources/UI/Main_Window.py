@@ -20,8 +20,8 @@ from PySide6.QtWidgets import (QAbstractSpinBox, QApplication, QFrame, QGridLayo
     QHeaderView, QLabel, QLineEdit, QMainWindow,
     QMenu, QMenuBar, QProgressBar, QPushButton,
     QSizePolicy, QSlider, QSpacerItem, QSpinBox,
-    QStatusBar, QTabWidget, QTreeWidget, QTreeWidgetItem,
-    QWidget)
+    QStatusBar, QTabWidget, QTreeView, QTreeWidget,
+    QTreeWidgetItem, QWidget)
 import Resources_rc
 
 class Ui_MainWindow(object):
@@ -222,10 +222,7 @@ class Ui_MainWindow(object):
         self.gridLayout_6.setSpacing(0)
         self.gridLayout_6.setObjectName(u"gridLayout_6")
         self.gridLayout_6.setContentsMargins(1, 1, 1, 1)
-        self.TotalImageNameTree = QTreeWidget(self.TotalImageFrame)
-        __qtreewidgetitem1 = QTreeWidgetItem()
-        __qtreewidgetitem1.setTextAlignment(0, Qt.AlignCenter);
-        self.TotalImageNameTree.setHeaderItem(__qtreewidgetitem1)
+        self.TotalImageNameTree = QTreeView(self.TotalImageFrame)
         self.TotalImageNameTree.setObjectName(u"TotalImageNameTree")
         sizePolicy.setHeightForWidth(self.TotalImageNameTree.sizePolicy().hasHeightForWidth())
         self.TotalImageNameTree.setSizePolicy(sizePolicy)
@@ -543,10 +540,7 @@ class Ui_MainWindow(object):
 
         self.gridLayout_7.addWidget(self.SubRotationalLabel, 1, 6, 1, 1)
 
-        self.SubImageNameTree = QTreeWidget(self.SubImageFrame)
-        __qtreewidgetitem4 = QTreeWidgetItem()
-        __qtreewidgetitem4.setTextAlignment(0, Qt.AlignCenter);
-        self.SubImageNameTree.setHeaderItem(__qtreewidgetitem4)
+        self.SubImageNameTree = QTreeView(self.SubImageFrame)
         self.SubImageNameTree.setObjectName(u"SubImageNameTree")
         sizePolicy.setHeightForWidth(self.SubImageNameTree.sizePolicy().hasHeightForWidth())
         self.SubImageNameTree.setSizePolicy(sizePolicy)
@@ -687,10 +681,7 @@ class Ui_MainWindow(object):
 
         self.gridLayout_2.addItem(self.AddRightSpacer, 1, 4, 1, 1)
 
-        self.AddImageNameTree = QTreeWidget(self.AddImageFrame)
-        __qtreewidgetitem5 = QTreeWidgetItem()
-        __qtreewidgetitem5.setTextAlignment(0, Qt.AlignCenter);
-        self.AddImageNameTree.setHeaderItem(__qtreewidgetitem5)
+        self.AddImageNameTree = QTreeView(self.AddImageFrame)
         self.AddImageNameTree.setObjectName(u"AddImageNameTree")
         sizePolicy.setHeightForWidth(self.AddImageNameTree.sizePolicy().hasHeightForWidth())
         self.AddImageNameTree.setSizePolicy(sizePolicy)
@@ -853,8 +844,6 @@ class Ui_MainWindow(object):
         self.MulAddCorrButton.setToolTip(QCoreApplication.translate("MainWindow", u"Add a multiplicative correction image.", None))
 #endif // QT_CONFIG(tooltip)
         self.MulAddCorrButton.setText("")
-        ___qtreewidgetitem = self.TotalImageNameTree.headerItem()
-        ___qtreewidgetitem.setText(0, QCoreApplication.translate("MainWindow", u"Total Images", None));
         self.DropFirstLabel.setText(QCoreApplication.translate("MainWindow", u" Drop:", None))
 #if QT_CONFIG(tooltip)
         self.DropFirstBox.setToolTip(QCoreApplication.translate("MainWindow", u"Drop the first (N) images of each cycle.", None))
@@ -902,8 +891,6 @@ class Ui_MainWindow(object):
 #endif // QT_CONFIG(tooltip)
         self.SubAddSetButton.setText("")
         self.SubRotationalLabel.setText(QCoreApplication.translate("MainWindow", u"0\u00b0", None))
-        ___qtreewidgetitem3 = self.SubImageNameTree.headerItem()
-        ___qtreewidgetitem3.setText(0, QCoreApplication.translate("MainWindow", u"Subtractive Images", None));
 #if QT_CONFIG(tooltip)
         self.SubRemoveSetButton.setToolTip(QCoreApplication.translate("MainWindow", u"Remove subtractive images.", None))
 #endif // QT_CONFIG(tooltip)
@@ -928,8 +915,6 @@ class Ui_MainWindow(object):
 #if QT_CONFIG(tooltip)
         self.AddRotationalSlider.setToolTip(QCoreApplication.translate("MainWindow", u"Rotate additive images.", None))
 #endif // QT_CONFIG(tooltip)
-        ___qtreewidgetitem4 = self.AddImageNameTree.headerItem()
-        ___qtreewidgetitem4.setText(0, QCoreApplication.translate("MainWindow", u"Additive Images", None));
         self.pixmapTabs.setTabText(self.pixmapTabs.indexOf(self.Image), QCoreApplication.translate("MainWindow", u"Image", None))
         self.menuHelp.setTitle(QCoreApplication.translate("MainWindow", u"Help", None))
         self.menuFile.setTitle(QCoreApplication.translate("MainWindow", u"File", None))
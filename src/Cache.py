@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Cache
+
+This script holds the process-wide cache of decoded images. Every
+path that needs pixels (selection, normalization, compiling and
+traces) loads its images through the same cache, so browsing back
+and forth between images does not read them from disk again.
+
+The statistics of each image, including its normalization factor,
+are additionally persisted to a small SQLite database in the user
+cache directory, so that reloading an unchanged image set does not
+read its images again.
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import os
+import sys
+import sqlite3
+import threading
+import numpy as np
+
+from collections import OrderedDict
+
+from src.Statistics import STATISTICS_DTYPE, empty_statistics
+
+#Byte budget of the frame cache, can be set in megabytes through
+#the 'ICT_FRAME_CACHE_MB' environment variable.
+DEFAULT_BUDGET = int(float(os.environ.get('ICT_FRAME_CACHE_MB', 2048)) * 1024 ** 2)
+
+#Directory of the persistent caches, can be set through the
+#'ICT_CACHE_DIR' environment variable.
+if os.environ.get('ICT_CACHE_DIR'):
+
+    CACHE_DIR = os.environ['ICT_CACHE_DIR']
+
+elif sys.platform == 'win32':
+
+    CACHE_DIR = os.path.join(os.environ.get('LOCALAPPDATA', os.path.expanduser('~')), 'Amorphous_Toolbox', 'Image_Compiler_Tool')
+
+else:
+
+    CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')), 'Amorphous_Toolbox', 'Image_Compiler_Tool')
+
+def memory_mapped(frame):
+    '''
+    Returns True if an array is a numpy.memmap or a view of one.
+    '''
+
+    while isinstance(frame, np.ndarray):
+
+        if isinstance(frame, np.memmap):
+
+            return True
+
+        frame = frame.base
+
+    return False
+
+class FrameCache:
+    '''
+    Least recently used cache of decoded images. Images are keyed by
+    their path, modification time, file size and rotation, so an image
+    that is changed on disk is never served stale. Once the stored
+    images exceed the byte budget the least recently used are evicted.
+    '''
+
+    def __init__(self, budget = DEFAULT_BUDGET):
+        '''
+        Creates the storage for the cached images and the lock shared
+        by the worker threads loading images.
+        '''
+
+        self.budget = budget
+        self.nbytes = 0
+        self.frames = OrderedDict()
+        self.lock = threading.Lock()
+
+    def key(self, path, rotation):
+        '''
+        Returns the cache key of an image, the file is stat'ed so that
+        a modified image invalidates its previous entries.
+        '''
+
+        stat = os.stat(path)
+
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, rotation % 4)
+
+    def get(self, path, rotation, loader):
+        '''
+        Returns the cached image for the given path and rotation. On a
+        miss the image is read with "loader(path, rotation)", stored
+        read-only and the least recently used images are evicted. A
+        memory-mapped image is copied into memory before it is stored,
+        so the cache holds no open file and its budget counts only
+        memory held by the process.
+        '''
+
+        key = self.key(path, rotation)
+
+        with self.lock:
+
+            if key in self.frames:
+
+                self.frames.move_to_end(key)
+
+                return self.frames[key]
+
+        frame = loader(path, rotation)
+
+        if memory_mapped(frame) == True:
+
+            frame = np.array(frame)
+
+        frame.setflags(write = False)
+
+        with self.lock:
+
+            if key not in self.frames and frame.nbytes <= self.budget:
+
+                self.frames[key] = frame
+                self.nbytes += frame.nbytes
+                self.evict()
+
+        return frame
+
+    def lookup(self, path, rotation):
+        '''
+        Returns the cached image for the given path and rotation, or None
+        on a miss. Nothing is stored, so streaming a whole image set does
+        not evict the images being browsed.
+        '''
+
+        key = self.key(path, rotation)
+
+        with self.lock:
+
+            return self.frames.get(key)
+
+    def evict(self):
+        '''
+        Removes the least recently used images until the stored images
+        fit within the byte budget. The lock must be held by the caller.
+        '''
+
+        while self.nbytes > self.budget and len(self.frames) != 0:
+
+            self.nbytes -= self.frames.popitem(last = False)[1].nbytes
+
+    def set_budget(self, budget):
+        '''
+        Changes the byte budget of the cache, evicting images if the
+        new budget is smaller than the stored images.
+        '''
+
+        with self.lock:
+
+            self.budget = budget
+            self.evict()
+
+    def clear(self):
+        '''
+        Removes all images from the cache.
+        '''
+
+        with self.lock:
+
+            self.frames.clear()
+            self.nbytes = 0
+
+frame_cache = FrameCache()
+
+class StatisticsCache:
+    '''
+    Persistent cache of the statistics record of each image (see
+    src.Statistics), stored in SQLite along with the modification time
+    and size of the image so that modified images are recalculated. If
+    the cache directory cannot be written the cache is disabled and
+    every lookup misses.
+    '''
+
+    #Incremented whenever the stored values change meaning
+    VERSION = 2
+
+    def __init__(self, path = os.path.join(CACHE_DIR, 'statistics.sqlite')):
+        '''
+        Creates the storage for the database connection, which is only
+        opened on first use.
+        '''
+
+        self.path = path
+        self.connection = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        '''
+        Opens the database, creating or resetting the table if it is
+        missing or was written by a different version. The lock must be
+        held by the caller.
+        '''
+
+        if self.connection is None:
+
+            try:
+
+                os.makedirs(os.path.dirname(self.path), exist_ok = True)
+
+                self.connection = sqlite3.connect(self.path, check_same_thread = False)
+
+                if self.connection.execute('PRAGMA user_version').fetchone()[0] != self.VERSION:
+
+                    self.connection.execute('DROP TABLE IF EXISTS statistics')
+                    self.connection.execute('PRAGMA user_version = ' + str(self.VERSION))
+
+                self.connection.execute('CREATE TABLE IF NOT EXISTS statistics (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, ' + \
+                                        ', '.join(field + ' ' + ('TEXT' if STATISTICS_DTYPE[field].kind == 'U' else 'REAL' if STATISTICS_DTYPE[field].kind == 'f' else 'INTEGER') \
+                                                  for field in STATISTICS_DTYPE.names) + ')')
+                self.connection.commit()
+
+            except (sqlite3.Error, OSError):
+
+                self.connection = False
+
+        return self.connection
+
+    def stat(self, path):
+        '''
+        Returns the absolute path, modification time and size of an image.
+        '''
+
+        stat = os.stat(path)
+
+        return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+    def lookup(self, paths):
+        '''
+        Returns the cached statistics table of the given images and a mask
+        of the images that were found, images that are missing or were
+        modified are left empty.
+        '''
+
+        statistics, found = empty_statistics(len(paths)), np.zeros(len(paths), dtype = bool)
+
+        with self.lock:
+
+            if self.connect() == False:
+
+                return statistics, found
+
+            try:
+
+                keys = [self.stat(path) for path in paths]
+
+                rows = {}
+                for start in range(0, len(keys), 500):
+
+                    chunk = [key[0] for key in keys[start:start + 500]]
+
+                    for row in self.connection.execute('SELECT * FROM statistics WHERE path IN (' + ','.join('?' * len(chunk)) + ')', chunk):
+
+                        rows[row[0]] = row[1:]
+
+            except (sqlite3.Error, OSError):
+
+                return statistics, found
+
+        for i, key in enumerate(keys):
+
+            if key[0] in rows and rows[key[0]][:2] == key[1:]:
+
+                statistics[i] = tuple(np.nan if value is None else value for value in rows[key[0]][2:])
+                found[i] = True
+
+        return statistics, found
+
+    def store(self, paths, statistics):
+        '''
+        Stores the statistics records of the given images.
+        '''
+
+        with self.lock:
+
+            if self.connect() == False:
+
+                return
+
+            try:
+
+                self.connection.executemany('INSERT OR REPLACE INTO statistics VALUES (' + ','.join('?' * (3 + len(STATISTICS_DTYPE.names))) + ')', \
+                                            [self.stat(path) + tuple(record.item()) for path, record in zip(paths, statistics)])
+                self.connection.commit()
+
+            except (sqlite3.Error, OSError):
+
+                pass
+
+statistics_cache = StatisticsCache()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Display
+
+This script estimates the statistics used to scale the colours of
+the PixMap. Rather than reading every pixel of the displayed image,
+the mean, standard deviation and percentiles are estimated from a
+strided subsample of the image. The percentiles are read from an
+equal-count histogram of the subsample, which is kept for the most
+recently displayed images so that changing the colour bounds of an
+image does not sample it again.
+
+To pan and zoom large images the PixMap also shows a pyramid of the
+image, each level averaging 2x2 pixels of the level below, and only
+the part of the level matching the zoom that is in view is drawn.
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import weakref
+import threading
+import numpy as np
+
+from collections import OrderedDict
+
+#Number of pixels sampled from an image to estimate its statistics
+DISPLAY_SAMPLES = 1 << 16
+
+#Number of equal-count bins of the histogram kept for each image
+HISTOGRAM_BINS = 1000
+
+#Number of images whose display statistics are kept
+CACHED_IMAGES = 16
+
+#Size below which no further pyramid levels are made
+PYRAMID_MIN_SIZE = 256
+
+def display_sample(img, samples = DISPLAY_SAMPLES):
+    '''
+    Returns the finite pixels of a strided subsample of an image, the
+    same stride is taken along each axis so that roughly "samples"
+    pixels are read. Images smaller than "samples" are read entirely.
+    '''
+
+    img = np.asarray(img)
+    stride = max(1, int(np.ceil((np.size(img) / samples) ** (1 / max(1, img.ndim)))))
+
+    sample = np.asarray(img[(slice(None, None, stride),) * img.ndim], dtype = np.float64).ravel()
+
+    return sample[np.isfinite(sample)]
+
+def image_pyramid(img, min_size = PYRAMID_MIN_SIZE):
+    '''
+    Returns the levels of the image pyramid, the first level is the
+    image itself and each following level averages 2x2 pixels of the
+    previous level as float32. Levels of odd size are padded with their
+    last row or column, so level k spans 2 ** k pixels of the image
+    per pixel. Levels are made until the smaller side of the image
+    falls below "min_size" pixels.
+    '''
+
+    levels = [img]
+
+    while min(np.shape(levels[-1])[:2]) >= 2 * min_size:
+
+        level = levels[-1]
+        rows, columns = np.shape(level)[:2]
+
+        if rows % 2 != 0 or columns % 2 != 0:
+
+            level = np.pad(level, [(0, rows % 2), (0, columns % 2)] + [(0, 0)] * (level.ndim - 2), mode = 'edge')
+
+        level = np.reshape(level, (np.shape(level)[0] // 2, 2, np.shape(level)[1] // 2, 2) + np.shape(level)[2:])
+        levels.append(np.mean(level, axis = (1, 3), dtype = np.float64).astype(np.float32))
+
+    return levels
+
+def pyramid_view(levels, xlim, ylim, width, height):
+    '''
+    Returns the part of the pyramid level to draw for the given axis
+    limits, in pixels of the image, and size of the axes in screen
+    pixels, along with its extent in pixels of the image. The level
+    is the coarsest with at least one of its pixels per screen pixel,
+    and is cropped to the limits with a margin of one pixel.
+    '''
+
+    x_min, x_max = sorted(xlim)
+    y_min, y_max = sorted(ylim)
+
+    scale = max((x_max - x_min) / max(1, width), (y_max - y_min) / max(1, height))
+    level = min(len(levels) - 1, max(0, int(np.floor(np.log2(max(1, scale))))))
+
+    factor = 2 ** level
+    rows, columns = np.shape(levels[level])[:2]
+
+    row_start = min(rows - 1, max(0, int(np.floor((y_min + 0.5) / factor)) - 1))
+    row_stop = max(row_start + 1, min(rows, int(np.ceil((y_max + 0.5) / factor)) + 1))
+    column_start = min(columns - 1, max(0, int(np.floor((x_min + 0.5) / factor)) - 1))
+    column_stop = max(column_start + 1, min(columns, int(np.ceil((x_max + 0.5) / factor)) + 1))
+
+    extent = (column_start * factor - 0.5, column_stop * factor - 0.5, row_start * factor - 0.5, row_stop * factor - 0.5)
+
+    return levels[level][row_start:row_stop, column_start:column_stop], extent
+
+class DisplayStatistics:
+    '''
+    Estimated mean, standard deviation and equal-count histogram of an
+    image. The histogram edges are the percentiles of the subsample at
+    evenly spaced levels, so any percentile is found by interpolating
+    between two edges.
+    '''
+
+    def __init__(self, img, samples = DISPLAY_SAMPLES):
+        '''
+        Samples the image and calculates its display statistics.
+        '''
+
+        sample = np.sort(display_sample(img, samples))
+
+        if len(sample) != 0:
+
+            self.mean, self.std = np.mean(sample), np.std(sample)
+            self.edges = np.interp(np.linspace(0, len(sample) - 1, HISTOGRAM_BINS + 1), np.arange(len(sample)), sample)
+
+        else:
+
+            self.mean, self.std = 0.0, 0.0
+            self.edges = np.zeros(HISTOGRAM_BINS + 1)
+
+    def std_bounds(self, std_min, std_max):
+        '''
+        Returns the colour bounds "std_min" standard deviations below and
+        "std_max" standard deviations above the mean.
+        '''
+
+        return self.mean - self.std * std_min, self.mean + self.std * std_max
+
+    def percentile(self, percent):
+        '''
+        Returns the estimated value below which "percent" of the pixels lie.
+        '''
+
+        return float(np.interp(percent, np.linspace(0, 100, HISTOGRAM_BINS + 1), self.edges))
+
+    def percentile_bounds(self, lower, upper):
+        '''
+        Returns the colour bounds at the "lower" and "upper" percentiles.
+        '''
+
+        return self.percentile(lower), self.percentile(upper)
+
+class DisplayCache:
+    '''
+    Least recently used cache of the display statistics of the images
+    shown on the PixMap. Images are keyed by identity and held through
+    weak references, so an entry never outlives its image.
+    '''
+
+    def __init__(self, size = CACHED_IMAGES):
+        '''
+        Creates the storage for the cached statistics.
+        '''
+
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, img):
+        '''
+        Returns the display statistics of an image, sampling the image
+        if its statistics are not cached.
+        '''
+
+        with self.lock:
+
+            entry = self.entries.get(id(img))
+
+            if entry is not None and entry[0]() is img:
+
+                self.entries.move_to_end(id(img))
+
+                return entry[1]
+
+        statistics = DisplayStatistics(img)
+
+        with self.lock:
+
+            self.entries[id(img)] = (weakref.ref(img), statistics)
+            self.entries.move_to_end(id(img))
+
+            while len(self.entries) > self.size:
+
+                self.entries.popitem(last = False)
+
+        return statistics
+
+    def clear(self):
+        '''
+        Removes all statistics from the cache.
+        '''
+
+        with self.lock:
+
+            self.entries.clear()
+
+display_cache = DisplayCache()
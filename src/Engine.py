@@ -0,0 +1,1067 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Engine
+
+This script is the compile engine of the application, it loads,
+normalizes, bounds and compiles additive and subtractive image sets,
+and calculates their traces, from plain parameters without any
+dependence on the GUI. The GUI classes read their parameters from the
+widgets and call these functions, running the long ones as background
+jobs, while the command line tool (Image_Compiler_CLI) reads the same
+parameters from a run manifest. Neither Qt nor matplotlib is imported
+here.
+
+Functions that loop over the images take an "imap(func, items)"
+used to map the reading of the images over a pool, yielding the
+results in any order, and an optional "report(value, maximum)"
+called with the progress of the loop. Functions doing numerical work
+on the images also take an optional "cpu_imap(func, items)" of the
+same form, used to spread that work over a pool of its own, without
+it the work is done by the caller.
+
+Images can also be compiled on a pool of processes, each process
+reads its share of the images and accumulates them into its own
+shared memory block, the blocks are only summed once every image is
+accumulated, so no image is sent between the processes.
+
+A compile can also be split into shards run by independent processes
+or machines sharing a file system. Each shard saves a partial result
+holding the sum of each cycle, its number of images and the sum of
+their normalization, any number of partial results are then merged
+into the same total and cycle images as a single compile.
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import os
+import queue
+import hashlib
+import itertools
+import threading
+import numpy as np
+
+from skimage import io
+from functools import partial
+from multiprocessing import get_context, shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.Cache import frame_cache, statistics_cache
+from src.Statistics import frame_statistics
+from src.Sets import std_mask, start_stop_mask
+from src.Tiff import memmap_tiff
+
+#Size of the scratch block used when accumulating images
+COMPILE_BLOCK_BYTES = 1 << 18
+
+#Images handed to a compile process at a time
+COMPILE_CHUNK = 4
+
+#Scratch buffers of the threads accumulating blocks of rows
+compile_threads = threading.local()
+
+#Accumulators and parameters of a compile process
+compile_worker = {}
+
+def imap_bounded(pool, func, items, in_flight):
+    '''
+    Bounded replacement of Pool.imap_unordered, yields the results of
+    func(item) in the order they complete. At most "in_flight" items are
+    running or waiting for the consumer at any time, a new item is only
+    submitted once a result is taken by the consumer.
+    '''
+
+    in_flight = max(1, in_flight)
+
+    results = queue.Queue()
+    items = iter(items)
+
+    def submit(item):
+
+        pool.apply_async(func, (item,), callback = lambda result: results.put((True, result)), \
+                         error_callback = lambda error: results.put((False, error)))
+
+    pending = 0
+    for item in itertools.islice(items, in_flight):
+
+        submit(item)
+        pending += 1
+
+    while pending != 0:
+
+        success, result = results.get()
+        pending -= 1
+
+        if success == False:
+
+            raise result
+
+        for item in itertools.islice(items, 1):
+
+            submit(item)
+            pending += 1
+
+        yield result
+
+def read_image(name, rotation = 0):
+    '''
+    Reads and rotates a .tiff image from disk by the given number of
+    clockwise quarter turns, bypassing the cache. Uncompressed images
+    are memory-mapped rather than decoded, images are kept in their
+    native dtype until they are accumulated.
+    '''
+
+    img = memmap_tiff(name)
+
+    if img is None:
+
+        img = io.imread(name, None)
+
+    return np.rot90(img, -rotation)
+
+def load_image(name, rotation = 0):
+    '''
+    Loads a .tiff image rotated by the given number of clockwise quarter
+    turns, images are shared through the process-wide frame cache.
+    '''
+
+    return frame_cache.get(name, rotation, read_image)
+
+def stream_image(name, rotation = 0):
+    '''
+    Loads a .tiff image for a pass over a whole image set, the image is
+    taken from the frame cache if it is there but is otherwise read
+    without being cached, so uncompressed images stay memory-mapped.
+    '''
+
+    img = frame_cache.lookup(name, rotation)
+
+    if img is None:
+
+        img = read_image(name, rotation)
+
+    return img
+
+def save_image(path, image):
+    '''
+    Saves a numpy array as a float32 .tiff image.
+    '''
+
+    io.imsave(path, image.astype('float32'))
+
+def load_frames(add_names, sub_names, add_rotation, sub_rotation, index):
+    '''
+    Loads the additive and subtractive images of a compile index in
+    their native dtype, a missing set of names loads no image.
+    '''
+
+    add_img, sub_img = None, None
+
+    if add_names is not None:
+
+        add_img = stream_image(add_names[index], add_rotation)
+
+    if sub_names is not None:
+
+        sub_img = stream_image(sub_names[index], sub_rotation)
+
+    return index, add_img, sub_img
+
+def compile_scratch(compile_img):
+    '''
+    Allocates the scratch buffer used by compile_image, sized to a block
+    of rows of the compile image.
+    '''
+
+    rows = max(1, COMPILE_BLOCK_BYTES // max(1, int(np.prod(np.shape(compile_img)[1:])) * 8))
+
+    return np.empty((min(rows, np.shape(compile_img)[0]),) + np.shape(compile_img)[1:])
+
+def thread_scratch(shape):
+    '''
+    Returns a scratch buffer of the given shape owned by the calling
+    thread, reused between calls.
+    '''
+
+    scratch = getattr(compile_threads, 'scratch', None)
+
+    if scratch is None or np.shape(scratch) != shape:
+
+        scratch = compile_threads.scratch = np.empty(shape)
+
+    return scratch
+
+def compile_block(compile_img, add_img, sub_img, scale, rows, start, scratch = None):
+    '''
+    Accumulates the normalized difference of a block of "rows" rows of
+    the additive and subtractive images, starting at row "start", into
+    the compile image. Without a scratch buffer the buffer of the
+    calling thread is used.
+    '''
+
+    if scratch is None:
+
+        scratch = thread_scratch((rows,) + np.shape(compile_img)[1:])
+
+    stop = min(start + rows, np.shape(compile_img)[0])
+    block, compile_rows = scratch[:stop - start], compile_img[start:stop]
+
+    if add_img is not None and sub_img is not None:
+
+        np.subtract(add_img[start:stop], sub_img[start:stop], out = block, dtype = np.float64)
+        np.multiply(block, scale, out = block)
+
+    elif add_img is not None:
+
+        np.multiply(add_img[start:stop], scale, out = block, dtype = np.float64)
+
+    else:
+
+        np.multiply(sub_img[start:stop], -scale, out = block, dtype = np.float64)
+
+    np.add(compile_rows, block, out = compile_rows)
+
+    return start
+
+def compile_image(compile_img, add_img, sub_img, scale, scratch = None, cpu_imap = None):
+    '''
+    Accumulates the normalized difference of the additive and subtractive
+    images into the float64 compile image in place. The images are
+    processed in blocks of rows through a small scratch buffer that stays
+    in cache, so no full-size temporary is allocated and each image is
+    read once. With a "cpu_imap" the blocks are accumulated on its pool,
+    each thread through a scratch buffer of its own.
+    '''
+
+    if scratch is None or np.shape(scratch)[1:] != np.shape(compile_img)[1:]:
+
+        scratch = compile_scratch(compile_img)
+
+    rows = np.shape(scratch)[0]
+
+    if cpu_imap is None:
+
+        for start in range(0, np.shape(compile_img)[0], rows):
+
+            compile_block(compile_img, add_img, sub_img, scale, rows, start, scratch)
+
+    else:
+
+        for start in cpu_imap(partial(compile_block, compile_img, add_img, sub_img, scale, rows), range(0, np.shape(compile_img)[0], rows)):
+
+            pass
+
+    return compile_img
+
+def normalization_factors(paths, index):
+    '''
+    Loads the image at "index" of the given image paths and returns the
+    index along with the statistics record of the image, including the
+    sum of intensity used for normalization.
+    '''
+
+    return frame_statistics_indexed(load_indexed(paths, index))
+
+def load_indexed(paths, index):
+    '''
+    Loads the image at "index" of the given image paths and returns the
+    index along with the image.
+    '''
+
+    return index, stream_image(paths[index])
+
+def frame_statistics_indexed(item):
+    '''
+    Returns the index of an (index, image) pair along with the
+    statistics record of the image.
+    '''
+
+    return item[0], frame_statistics(item[1])
+
+def set_statistics(names, imap = map, report = None, cpu_imap = None):
+    '''
+    Returns the statistics table of the given images. Images found in the
+    statistics cache are not read, the statistics of the remaining images
+    are calculated and stored. With a "cpu_imap" the images are read on
+    the pool of "imap" and their statistics calculated on its own pool.
+    '''
+
+    statistics, found = statistics_cache.lookup(names)
+
+    missing = np.where(found == False)[0]
+
+    if report is not None:
+
+        report(0, len(missing))
+
+    if cpu_imap is None:
+
+        records = imap(partial(normalization_factors, names), missing)
+
+    else:
+
+        records = cpu_imap(frame_statistics_indexed, imap(partial(load_indexed, names), missing))
+
+    for count, results in enumerate(records):
+
+        statistics[results[0]] = results[1]
+
+        if report is not None:
+
+            report(count + 1, len(missing))
+
+    statistics_cache.store(names[missing], statistics[missing])
+
+    return statistics
+
+def normalize_set(image_set, statistics):
+    '''
+    Gives a loaded image set its statistics table, each image is
+    normalized by its sum of intensity.
+    '''
+
+    image_set.statistics = statistics
+    image_set.normalization = np.copy(statistics['Sum'])
+
+def set_bounds(image_set, drop_first, drop_last, std_min, std_max):
+    '''
+    Rejects the images of a set within the first "drop_first" or last
+    "drop_last" images of their cycle, or whose normalization is outside
+    "std_min" and "std_max" standard deviations of the average.
+    '''
+
+    image_set.accepted &= start_stop_mask(image_set.offsets, drop_first, drop_last)
+    image_set.accepted &= std_mask(image_set.normalization, std_min, std_max)
+
+def merge_bounds(add_set, sub_set):
+    '''
+    If both sets are loaded an image is only accepted if it is accepted
+    in both the additive and subtractive set.
+    '''
+
+    if len(add_set) != 0 and len(sub_set) != 0:
+
+        add_set.accepted &= sub_set.accepted
+        sub_set.accepted[:] = add_set.accepted
+
+def bound_sets(add_set, sub_set, drop_first, drop_last, add_std, sub_std):
+    '''
+    Recalculates the accepted images of the additive and subtractive
+    sets from scratch, "add_std" and "sub_std" hold the standard
+    deviations below and above the average normalization accepted in
+    each set. Sets that are not loaded are left untouched.
+    '''
+
+    for image_set, (std_min, std_max) in ((add_set, add_std), (sub_set, sub_std)):
+
+        if len(image_set) != 0:
+
+            image_set.accepted.fill(True)
+
+            set_bounds(image_set, drop_first, drop_last, std_min, std_max)
+
+    merge_bounds(add_set, sub_set)
+
+def compile_parameters(add_set, sub_set):
+    '''
+    Gathers the accepted additive and subtractive image names, the
+    compile normalization of each accepted image and the cycle each
+    accepted image belongs to. A set that is not loaded gives no names.
+    '''
+
+    add_names, sub_names = None, None
+
+    image_set = add_set if len(add_set) != 0 else sub_set
+
+    in_indicies = np.where(image_set.accepted == True)
+
+    compile_cycles = image_set.cycle_index()[in_indicies]
+    compile_norms = np.ones(len(in_indicies[0]))
+
+    if len(add_set) != 0:
+
+        add_names = add_set.names[in_indicies]
+        compile_norms = compile_norms + add_set.normalization[in_indicies]
+
+    if len(sub_set) != 0:
+
+        sub_names = sub_set.names[in_indicies]
+        compile_norms = compile_norms - sub_set.normalization[in_indicies]
+
+    return add_names, sub_names, compile_norms, compile_cycles
+
+def accepted_parameters(image_set):
+    '''
+    Returns the names and normalization of the accepted images of a set.
+    '''
+
+    in_indicies = np.where(image_set.accepted == True)
+
+    return image_set.names[in_indicies], image_set.normalization[in_indicies]
+
+def compile_images(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, \
+                   total = True, cycles = False, singles = False, imap = map, report = None, cpu_imap = None):
+    '''
+    Compiles the accepted images in a single pass over the data set,
+    each image is read once and simultaneously feeds the total image,
+    the cycle images and the individual images that were requested.
+    Each cycle accumulates its images divided by their normalization and
+    is written, scaled by its average normalization, as soon as its last
+    image is accumulated, so only the cycles in flight hold an
+    accumulator. The images are saved to "path" followed by their cycle
+    or item number, the total image is saved to "path" itself. Unless
+    "cycles" is set every image is compiled as a single cycle.
+    '''
+
+    if cycles == False:
+
+        compile_cycles = np.zeros_like(compile_cycles)
+
+    avg_compile_norm = np.average(compile_norms)
+
+    remaining = np.bincount(compile_cycles)
+
+    if report is not None:
+
+        report(0, len(compile_norms))
+
+    cycle_imgs, total_img, single_img = {}, None, None
+
+    for count, (index, add_img, sub_img) in enumerate(imap(partial(load_frames, add_names, sub_names, add_rotation, sub_rotation), range(len(compile_norms)))):
+
+        if single_img is None:
+
+            single_img = np.zeros(np.shape(add_img if add_img is not None else sub_img))
+            scratch = compile_scratch(single_img)
+
+        cycle = compile_cycles[index]
+
+        if total == True or cycles == True:
+
+            if cycle not in cycle_imgs:
+
+                cycle_imgs[cycle] = np.zeros_like(single_img)
+
+            compile_image(cycle_imgs[cycle], add_img, sub_img, 1 / compile_norms[index], scratch, cpu_imap)
+
+        if singles == True:
+
+            single_img.fill(0)
+            compile_image(single_img, add_img, sub_img, avg_compile_norm / compile_norms[index], scratch, cpu_imap)
+            np.divide(single_img, mul_img, out = single_img)
+
+            save_image(path + '_Item_' + str(index) + '.tiff', single_img)
+
+        del add_img, sub_img
+
+        remaining[cycle] -= 1
+
+        if remaining[cycle] == 0 and cycle in cycle_imgs:
+
+            cycle_img = cycle_imgs.pop(cycle)
+
+            if total == True:
+
+                if cycles == False:
+
+                    total_img = cycle_img
+
+                elif total_img is None:
+
+                    total_img = cycle_img.copy()
+
+                else:
+
+                    np.add(total_img, cycle_img, out = total_img)
+
+            if cycles == True:
+
+                np.multiply(cycle_img, np.average(compile_norms[compile_cycles == cycle]), out = cycle_img)
+                np.divide(cycle_img, mul_img, out = cycle_img)
+
+                save_image(path + '_Cycle_' + str(cycle) + '.tiff', cycle_img)
+
+            del cycle_img
+
+        if report is not None:
+
+            report(count + 1, len(compile_norms))
+
+    if total == True:
+
+        np.multiply(total_img, avg_compile_norm, out = total_img)
+        np.divide(total_img, mul_img, out = total_img)
+
+        save_image(path + '.tiff', total_img)
+
+def compile_sets(add_set, sub_set, add_rotation, sub_rotation, mul_img, path, \
+                 total = True, cycles = False, singles = False, imap = map, report = None, processes = 0, cpu_imap = None):
+    '''
+    Compiles the accepted images of the additive and subtractive sets
+    (see compile_images) and returns the number of compiled images. If
+    "processes" is set the images are compiled on a pool of processes
+    (see compile_images_processes) rather than through "imap".
+    '''
+
+    add_names, sub_names, compile_norms, compile_cycles = compile_parameters(add_set, sub_set)
+
+    if len(compile_norms) != 0 and processes > 0:
+
+        compile_images_processes(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, \
+                                 total, cycles, singles, processes, report)
+
+    elif len(compile_norms) != 0:
+
+        compile_images(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, \
+                       total, cycles, singles, imap, report, cpu_imap)
+
+    return len(compile_norms)
+
+def init_compile_worker(blocks, shape, parameters):
+    '''
+    Initializer of a compile process, takes a shared memory block of
+    its own from the "blocks" queue to accumulate its images into. The
+    block holds the cycle and number of the accumulated images followed
+    by a single accumulator.
+    '''
+
+    block = shared_memory.SharedMemory(name = blocks.get())
+
+    compile_worker.update(parameters)
+    compile_worker['block'] = block
+    compile_worker['held'] = np.ndarray((2,), dtype = np.float64, buffer = block.buf)
+    compile_worker['accumulator'] = np.ndarray(shape, dtype = np.float64, buffer = block.buf, offset = 16)
+    compile_worker['single_img'] = np.zeros(shape)
+    compile_worker['scratch'] = compile_scratch(compile_worker['single_img'])
+
+def accumulate_frames(cycle, indicies):
+    '''
+    Compile process task, reads the additive and subtractive images of
+    each compile index of a cycle and accumulates them into the
+    accumulator of the process, saving the individual images if
+    requested. If the accumulator holds images of another cycle they
+    are flushed first and returned to the parent as the cycle, number
+    of images and their sum, along with the number of images read.
+    '''
+
+    worker = compile_worker
+
+    flushed = None
+
+    if worker['held'][1] != 0 and worker['held'][0] != cycle:
+
+        flushed = (int(worker['held'][0]), int(worker['held'][1]), worker['accumulator'].copy())
+
+        worker['accumulator'].fill(0)
+        worker['held'][1] = 0
+
+    worker['held'][0] = cycle
+
+    for index in indicies:
+
+        accumulate_frame(index)
+
+    return len(indicies), flushed
+
+def accumulate_frame(index):
+    '''
+    Accumulates the images of a single compile index (see accumulate_frames).
+    '''
+
+    worker = compile_worker
+
+    add_img, sub_img = None, None
+
+    if worker['add_names'] is not None:
+
+        add_img = read_image(worker['add_names'][index], worker['add_rotation'])
+
+    if worker['sub_names'] is not None:
+
+        sub_img = read_image(worker['sub_names'][index], worker['sub_rotation'])
+
+    if worker['accumulate'] == True:
+
+        compile_image(worker['accumulator'], add_img, sub_img, 1 / worker['compile_norms'][index], worker['scratch'])
+
+        worker['held'][1] += 1
+
+    if worker['singles'] == True:
+
+        worker['single_img'].fill(0)
+        compile_image(worker['single_img'], add_img, sub_img, worker['avg_compile_norm'] / worker['compile_norms'][index], worker['scratch'])
+        np.divide(worker['single_img'], worker['mul_img'], out = worker['single_img'])
+
+        save_image(worker['path'] + '_Item_' + str(index) + '.tiff', worker['single_img'])
+
+def compile_images_processes(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, \
+                             total = True, cycles = False, singles = False, processes = 1, report = None):
+    '''
+    Compiles the accepted images as compile_images does, on a pool of
+    "processes" processes rather than threads so that decoding and
+    accumulating the images is not held by the GIL. The images are sent
+    to the processes in runs of a single cycle, in cycle order, and each
+    process holds one accumulator in its own shared memory block. A
+    process hands its accumulator back to the parent when it moves on to
+    another cycle, the parent reads the blocks once all images are
+    accumulated. Each cycle is scaled and saved as soon as all its
+    images are handed back, so only the cycles in flight are held by the
+    parent. The individual images are saved by the processes themselves.
+    '''
+
+    if cycles == False:
+
+        compile_cycles = np.zeros_like(compile_cycles)
+
+    avg_compile_norm = np.average(compile_norms)
+
+    accumulate = total == True or cycles == True
+
+    first = add_names[0] if add_names is not None else sub_names[0]
+    image_shape = np.shape(read_image(first, add_rotation if add_names is not None else sub_rotation))
+
+    order = np.argsort(compile_cycles, kind = 'stable')
+    runs = np.split(order, np.flatnonzero(np.diff(compile_cycles[order])) + 1)
+    tasks = [(int(compile_cycles[run[0]]), run[start:start + COMPILE_CHUNK]) for run in runs for start in range(0, len(run), COMPILE_CHUNK)]
+
+    processes = max(1, min(int(processes), len(tasks)))
+
+    parameters = {'add_names': add_names, 'sub_names': sub_names, 'add_rotation': add_rotation, 'sub_rotation': sub_rotation,
+                  'compile_norms': compile_norms, 'compile_cycles': compile_cycles, 'avg_compile_norm': avg_compile_norm,
+                  'mul_img': mul_img if singles == True else 1.0, 'path': path, 'accumulate': accumulate, 'singles': singles == True}
+
+    remaining = np.bincount(compile_cycles)
+    cycle_imgs, total_img = {}, None
+
+    def gather(cycle, count, img):
+
+        nonlocal total_img
+
+        if cycle not in cycle_imgs:
+
+            cycle_imgs[cycle] = np.zeros(image_shape)
+
+        np.add(cycle_imgs[cycle], img, out = cycle_imgs[cycle])
+
+        remaining[cycle] -= count
+
+        if remaining[cycle] == 0:
+
+            cycle_img = cycle_imgs.pop(cycle)
+
+            if total == True:
+
+                if total_img is None:
+
+                    total_img = cycle_img.copy()
+
+                else:
+
+                    np.add(total_img, cycle_img, out = total_img)
+
+            if cycles == True:
+
+                np.multiply(cycle_img, np.average(compile_norms[compile_cycles == cycle]), out = cycle_img)
+                np.divide(cycle_img, mul_img, out = cycle_img)
+
+                save_image(path + '_Cycle_' + str(cycle) + '.tiff', cycle_img)
+
+    context = get_context('spawn')
+    blocks, free = [], context.Queue()
+
+    try:
+
+        for process in range(processes):
+
+            blocks.append(shared_memory.SharedMemory(create = True, size = 16 + int(np.prod(image_shape)) * 8))
+            np.ndarray((2,), dtype = np.float64, buffer = blocks[-1].buf).fill(0)
+
+            free.put(blocks[-1].name)
+
+        executor = ProcessPoolExecutor(processes, context, init_compile_worker, (free, image_shape, parameters))
+
+        try:
+
+            if report is not None:
+
+                report(0, len(compile_norms))
+
+            futures = [executor.submit(accumulate_frames, cycle, indicies) for cycle, indicies in tasks]
+
+            count = 0
+            for future in as_completed(futures):
+
+                read, flushed = future.result()
+
+                if flushed is not None:
+
+                    gather(*flushed)
+
+                count += read
+
+                if report is not None:
+
+                    report(count, len(compile_norms))
+
+        finally:
+
+            executor.shutdown(cancel_futures = True)
+
+        for block in blocks:
+
+            cycle, count = np.ndarray((2,), dtype = np.float64, buffer = block.buf).astype(int)
+
+            if count != 0:
+
+                gather(cycle, count, np.ndarray(image_shape, dtype = np.float64, buffer = block.buf, offset = 16))
+
+        if total == True and accumulate == True:
+
+            np.multiply(total_img, avg_compile_norm, out = total_img)
+            np.divide(total_img, mul_img, out = total_img)
+
+            save_image(path + '.tiff', total_img)
+
+    finally:
+
+        for block in blocks:
+
+            block.close()
+            block.unlink()
+
+def shard_indicies(length, shard, shards):
+    '''
+    Returns the compile indicies of a shard, the indicies are split into
+    "shards" contiguous runs of nearly equal length.
+    '''
+
+    return np.array_split(np.arange(length), shards)[shard]
+
+def compile_fingerprint(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, \
+                        multiplicative = None, total = True, cycles = False, singles = False):
+    '''
+    Returns a digest of the parameters of a compile, including the name
+    and rotation of its multiplicative correction and the images it
+    outputs. The partial results of shards of the same compile share the
+    same fingerprint.
+    '''
+
+    digest = hashlib.sha1()
+
+    for names in (add_names, sub_names):
+
+        digest.update(b'\0'.join(str(name).encode() for name in names) if names is not None else b'None')
+        digest.update(b'\1')
+
+    digest.update(str((add_rotation, sub_rotation)).encode())
+    digest.update(np.ascontiguousarray(compile_norms, dtype = np.float64).tobytes())
+    digest.update(np.ascontiguousarray(compile_cycles, dtype = np.int64).tobytes())
+
+    mul_name, mul_rotation = multiplicative if multiplicative is not None else ('', 0)
+
+    digest.update(str((os.path.abspath(mul_name) if mul_name != '' else '', int(mul_rotation) % 4)).encode())
+    digest.update(str((total == True, cycles == True, singles == True)).encode())
+
+    return digest.hexdigest()
+
+def compile_partial(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, shard, shards, \
+                    total = True, cycles = False, singles = False, multiplicative = None, imap = map, report = None, cpu_imap = None):
+    '''
+    Compiles a single shard of the accepted images and saves its partial
+    result to "path" followed by the shard number. The partial result
+    holds the sum of each cycle the shard covers, divided by the
+    normalization of its images as in compile_images, along with the
+    number of images and sum of normalization of each cycle. "total" and
+    "cycles" are recorded as the outputs of the merge, "multiplicative"
+    as the name and rotation of the multiplicative correction divided
+    out on the merge. Individual images are saved by the shard itself.
+    Returns the path of the partial result.
+    '''
+
+    avg_compile_norm = np.average(compile_norms)
+
+    indicies = shard_indicies(len(compile_norms), shard, shards)
+    compiled = np.unique(compile_cycles[indicies])
+
+    if report is not None:
+
+        report(0, len(indicies))
+
+    cycle_imgs, single_img = None, None
+
+    for count, (index, add_img, sub_img) in enumerate(imap(partial(load_frames, add_names, sub_names, add_rotation, sub_rotation), indicies)):
+
+        if single_img is None:
+
+            single_img = np.zeros(np.shape(add_img if add_img is not None else sub_img))
+            cycle_imgs = np.zeros((len(compiled),) + np.shape(single_img))
+            scratch = compile_scratch(single_img)
+
+        compile_image(cycle_imgs[np.searchsorted(compiled, compile_cycles[index])], add_img, sub_img, 1 / compile_norms[index], scratch, cpu_imap)
+
+        if singles == True:
+
+            single_img.fill(0)
+            compile_image(single_img, add_img, sub_img, avg_compile_norm / compile_norms[index], scratch, cpu_imap)
+            np.divide(single_img, mul_img, out = single_img)
+
+            save_image(path + '_Item_' + str(index) + '.tiff', single_img)
+
+        del add_img, sub_img
+
+        if report is not None:
+
+            report(count + 1, len(indicies))
+
+    if cycle_imgs is None:
+
+        cycle_imgs = np.zeros((0, 0, 0))
+
+    shard_cycles = compile_cycles[indicies]
+    mul_name, mul_rotation = multiplicative if multiplicative is not None else ('', 0)
+
+    partial_path = path + '_Part_' + str(shard) + '.npz'
+
+    #Written under a temporary name so a merge never reads a partial result being written
+    with open(partial_path + '.tmp', 'wb') as partial_file:
+
+        np.savez(partial_file, sums = cycle_imgs, cycles = compiled, \
+                 counts = np.array([np.count_nonzero(shard_cycles == cycle) for cycle in compiled], dtype = np.int64), \
+                 norm_sums = np.array([np.sum(compile_norms[indicies][shard_cycles == cycle]) for cycle in compiled]), \
+                 shard = shard, shards = shards, images = len(compile_norms), total = total == True, cycles_out = cycles == True, \
+                 path = path, multiplicative = str(mul_name), multiplicative_rotation = int(mul_rotation), \
+                 fingerprint = compile_fingerprint(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, \
+                                                   multiplicative, total, cycles, singles))
+
+    os.replace(partial_path + '.tmp', partial_path)
+
+    return partial_path
+
+def merge_partials(paths, path = None, report = None):
+    '''
+    Merges the partial results of every shard of a compile into the
+    total and cycle images recorded by the shards, saved to "path" or
+    otherwise to the path recorded by the shards. The cycle sums of the
+    shards are added and scaled by the average normalization of their
+    cycle, and the total image by the average normalization of every
+    image, as in a single compile. Returns the number of merged images.
+    '''
+
+    if len(paths) == 0:
+
+        raise ValueError('No partial results are given')
+
+    partials = []
+
+    for name in paths:
+
+        with np.load(name, allow_pickle = False) as partial_file:
+
+            partials.append({key: partial_file[key] for key in partial_file.files})
+
+    first = partials[0]
+
+    for name, partial_result in zip(paths, partials):
+
+        if str(partial_result['fingerprint']) != str(first['fingerprint']) or int(partial_result['shards']) != int(first['shards']):
+
+            raise ValueError(name + ' is a partial result of a different compile than ' + paths[0])
+
+    shards = sorted(int(partial_result['shard']) for partial_result in partials)
+
+    if len(set(shards)) != len(shards):
+
+        duplicated = sorted(set(shard for shard in shards if shards.count(shard) > 1))
+
+        raise ValueError('Partial results of shards ' + str(duplicated) + ' are given more than once')
+
+    missing = sorted(set(range(int(first['shards']))) - set(shards))
+
+    if len(missing) != 0:
+
+        raise ValueError('Partial results of shards ' + str(missing) + ' are missing')
+
+    compiled = np.unique(np.concatenate([partial_result['cycles'] for partial_result in partials]))
+
+    cycle_imgs, counts, norm_sums = None, np.zeros(len(compiled), dtype = np.int64), np.zeros(len(compiled))
+
+    if report is not None:
+
+        report(0, len(partials))
+
+    for count, partial_result in enumerate(partials):
+
+        slots = np.searchsorted(compiled, partial_result['cycles'])
+
+        if len(slots) != 0 and cycle_imgs is None:
+
+            cycle_imgs = np.zeros((len(compiled),) + np.shape(partial_result['sums'])[1:])
+
+        for slot, cycle_img in zip(slots, partial_result['sums']):
+
+            np.add(cycle_imgs[slot], cycle_img, out = cycle_imgs[slot])
+
+        np.add.at(counts, slots, partial_result['counts'])
+        np.add.at(norm_sums, slots, partial_result['norm_sums'])
+
+        if report is not None:
+
+            report(count + 1, len(partials))
+
+    if np.sum(counts) != int(first['images']):
+
+        raise ValueError('The partial results hold ' + str(np.sum(counts)) + ' of ' + str(int(first['images'])) + ' images')
+
+    path = str(first['path']) if path is None else path
+
+    mul_img = 1.0
+
+    if str(first['multiplicative']) != '':
+
+        mul_img = load_image(str(first['multiplicative']), int(first['multiplicative_rotation']))
+
+    if bool(first['total']) == True:
+
+        total_img = np.sum(cycle_imgs, axis = 0)
+
+        np.multiply(total_img, np.sum(norm_sums) / np.sum(counts), out = total_img)
+        np.divide(total_img, mul_img, out = total_img)
+
+        save_image(path + '.tiff', total_img)
+
+    if bool(first['cycles_out']) == True:
+
+        for slot, cycle in enumerate(compiled):
+
+            cycle_img = cycle_imgs[slot]
+
+            np.multiply(cycle_img, norm_sums[slot] / counts[slot], out = cycle_img)
+            np.divide(cycle_img, mul_img, out = cycle_img)
+
+            save_image(path + '_Cycle_' + str(cycle) + '.tiff', cycle_img)
+
+    return int(np.sum(counts))
+
+def scaled_image(paths, norms, avg_norm, rotation, index):
+    '''
+    Loads the image at "index" of the given paths, scaled from its own
+    normalization to the average normalization.
+    '''
+
+    return index, stream_image(paths[index], rotation) / norms[index] * avg_norm
+
+def stack_traces(names, norms, rotation, line_y, line_x, imap = map, report = None):
+    '''
+    Yields the trace along the pixels "line_y", "line_x" of each of the
+    given images, scaled to their average normalization.
+    '''
+
+    avg_norm = np.average(norms)
+
+    if report is not None:
+
+        report(0, len(names))
+
+    for count, (index, img) in enumerate(imap(partial(scaled_image, names, norms, avg_norm, rotation), range(len(names)))):
+
+        yield img[line_y, line_x]
+
+        if report is not None:
+
+            report(count + 1, len(names))
+
+def stack_total_traces(add_names, sub_names, add_rotation, sub_rotation, compile_norms, mul_img, line_y, line_x, imap = map, report = None, cpu_imap = None):
+    '''
+    Yields the trace along the pixels "line_y", "line_x" of each total
+    image, the difference of an additive and subtractive image scaled
+    to the average compile normalization and divided by the
+    multiplicative correction.
+    '''
+
+    avg_compile_norm = np.average(compile_norms)
+
+    if report is not None:
+
+        report(0, len(compile_norms))
+
+    compile_img = None
+
+    for count, (index, add_img, sub_img) in enumerate(imap(partial(load_frames, add_names, sub_names, add_rotation, sub_rotation), range(len(compile_norms)))):
+
+        if compile_img is None:
+
+            compile_img = np.zeros(np.shape(add_img if add_img is not None else sub_img))
+            scratch = compile_scratch(compile_img)
+
+        compile_img.fill(0)
+        compile_image(compile_img, add_img, sub_img, avg_compile_norm / compile_norms[index], scratch, cpu_imap)
+
+        yield (compile_img / mul_img)[line_y, line_x]
+
+        if report is not None:
+
+            report(count + 1, len(compile_norms))
+
+def compile_traces(names, norms, rotation, line_y, line_x, imap = map, report = None):
+    '''
+    Returns the trace along the pixels "line_y", "line_x" of the sum of
+    the given images, each scaled to their average normalization.
+    '''
+
+    avg_norm = np.average(norms)
+
+    if report is not None:
+
+        report(0, len(names))
+
+    total_img = None
+
+    for count, (index, img) in enumerate(imap(partial(scaled_image, names, norms, avg_norm, rotation), range(len(names)))):
+
+        if total_img is None:
+
+            total_img = img
+
+        else:
+
+            total_img += img
+
+        if report is not None:
+
+            report(count + 1, len(names))
+
+    return total_img[line_y, line_x]
+
+def compile_total_traces(add_names, sub_names, add_rotation, sub_rotation, compile_norms, mul_img, line_y, line_x, imap = map, report = None, cpu_imap = None):
+    '''
+    Returns the trace along the pixels "line_y", "line_x" of the total
+    image compiled from the given additive and subtractive images.
+    '''
+
+    avg_compile_norm = np.average(compile_norms)
+
+    if report is not None:
+
+        report(0, len(compile_norms))
+
+    total_img = None
+
+    for count, (index, add_img, sub_img) in enumerate(imap(partial(load_frames, add_names, sub_names, add_rotation, sub_rotation), range(len(compile_norms)))):
+
+        if total_img is None:
+
+            total_img = np.zeros(np.shape(add_img if add_img is not None else sub_img))
+            scratch = compile_scratch(total_img)
+
+        compile_image(total_img, add_img, sub_img, avg_compile_norm / compile_norms[index], scratch, cpu_imap)
+
+        if report is not None:
+
+            report(count + 1, len(compile_norms))
+
+    total_img /= mul_img
+
+    return total_img[line_y, line_x]
@@ -14,14 +14,13 @@
 import os
 import ctypes
 import numpy as np
-from skimage import io
 from functools import partial
 
-from PySide6.QtWidgets import QFileDialog
+from PySide6.QtWidgets import QFileDialog, QInputDialog
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QAction
 
-from multiprocessing.pool import ThreadPool as Pool
-from multiprocessing import cpu_count 
+from src.Engine import load_image, save_image, compile_parameters, compile_images, compile_images_processes, compile_partial, merge_partials
 
 class Files:
 
@@ -43,6 +42,17 @@ class Files:
         self.win.actionTotalImage.triggered.connect(lambda: self.save_total(False))
         self.win.actionCycleImages.triggered.connect(self.save_cycles)
         self.win.actionSingleImages.triggered.connect(lambda: self.save_total(True))
+
+        self.win.actionAllImages = QAction('Compile Image Collection - Total, Cycles and Individuals', self.win)
+        self.win.menuSaveImages.addAction(self.win.actionAllImages)
+        self.win.actionAllImages.triggered.connect(self.save_all)
+
+        self.win.actionPartialImages = QAction('Compile Image Shard - Partial Result', self.win)
+        self.win.actionMergePartials = QAction('Merge Partial Results', self.win)
+        self.win.menuSaveImages.addAction(self.win.actionPartialImages)
+        self.win.menuSaveImages.addAction(self.win.actionMergePartials)
+        self.win.actionPartialImages.triggered.connect(self.save_partial)
+        self.win.actionMergePartials.triggered.connect(self.merge_partial)
         
         
     #Browse file directory for multiple items/images to populate
@@ -79,11 +89,13 @@ class Files:
         
         return fileBrowse.getExistingDirectory(self.win, 'Load Output Directory', '')
     
-    #Loads a .tiff image into a numpy array
+    #Loads a .tiff image into a numpy array rotated by the given
+    #number of clockwise quarter turns, images are shared through
+    #the process-wide frame cache.
     #=============================================================
-    def load_image(self, name):
+    def load_image(self, name, rotation = 0):
 
-        return io.imread(name, None).astype(float)
+        return load_image(name, rotation)
     
     #Outputs selected output directory into QLineEdit
     #=============================================================
@@ -95,13 +107,13 @@ class Files:
     #=============================================================
     def save_image(self, path, image):
         
-        io.imsave(path, image.astype('float32'))
+        save_image(path, image)
 
     def load_correction(self):
 
         if self.win.MulCorrNameTree.topLevelItemCount() != 0:
 
-            mul_img = np.rot90(self.load_image(self.win.trees.multiplicative_parameters['Name']), -self.win.MulCorrRotationalSlider.value())
+            mul_img = self.load_image(self.win.trees.multiplicative_parameters['Name'], self.win.MulCorrRotationalSlider.value())
 
         else:
 
@@ -109,142 +121,151 @@ class Files:
 
         return mul_img
     
-    def compile_image(self, add_names, sub_names, compile_norms, avg_compile_norm, index):
-
-        compile_img = np.zeros((1, 1))
-
-        if self.win.AddImageNameTree.topLevelItemCount() != 0:
-            
-            add_img = np.rot90(self.load_image(add_names[index]), -self.win.AddRotationalSlider.value())
-
-            compile_img = add_img + compile_img
-
-        if self.win.SubImageNameTree.topLevelItemCount() != 0:
-            
-            sub_img = np.rot90(self.load_image(sub_names[index]), -self.win.SubRotationalSlider.value())
+    #Gathers the accepted additive and subtractive image names, the
+    #compile normalization of each accepted image and the cycle each
+    #accepted image belongs to.
+    #=============================================================
+    def compile_parameters(self):
 
-            compile_img = -sub_img + compile_img
+        return compile_parameters(self.win.trees.additive_parameters, self.win.trees.subtractive_parameters)
 
-        return index, compile_img / compile_norms[index] * avg_compile_norm
+    #Compiles the accepted images in a single pass over the data set,
+    #each image is read once and simultaneously feeds the total image,
+    #the cycle images and the individual images that were requested
+    #(see src.Engine). The compile runs as a background job, the
+    #parameters are gathered here and the job only reads them. If
+    #compile processes are set the images are compiled on a pool of
+    #processes rather than the I/O threads.
+    #=============================================================
+    def compile_set(self, total = True, cycles = False, singles = False, shard = None):
 
-    def save_total(self, single_check = False):
+        self.win.trees.flush_update()
 
-        if self.win.AddImageNameTree.topLevelItemCount() != 0 or self.win.SubImageNameTree.topLevelItemCount() != 0:
+        if self.win.AddImageNameTree.model().rowCount() != 0 or self.win.SubImageNameTree.model().rowCount() != 0:
 
             mul_img = self.load_correction()
 
-            compile_norms = np.ones((1))
+            add_names, sub_names, compile_norms, compile_cycles = self.compile_parameters()
 
-            if self.win.AddImageNameTree.topLevelItemCount() != 0:
+            if len(compile_norms) == 0:
 
-                in_indicies = np.where(np.hstack(self.win.trees.additive_parameters['Accepted']) == True)
+                return
 
-                add_norms = np.hstack(self.win.trees.additive_parameters['Normalization'])[in_indicies]
-                add_names = np.hstack(self.win.trees.additive_parameters['Names'])[in_indicies]
+            path = os.path.join(self.win.FolderBox.text(), self.win.NameBox.text())
+            reads = (self.win.AddImageNameTree.model().title, self.win.SubImageNameTree.model().title)
 
-                compile_norms = add_norms + compile_norms
+            if shard is not None:
 
-                avg_compile_norm = np.average(compile_norms)
+                multiplicative = None
 
-            if self.win.SubImageNameTree.topLevelItemCount() != 0:
+                if self.win.MulCorrNameTree.topLevelItemCount() != 0:
 
-                in_indicies = np.where(np.hstack(self.win.trees.subtractive_parameters['Accepted']) == True)
+                    multiplicative = (self.win.trees.multiplicative_parameters['Name'], self.win.MulCorrRotationalSlider.value())
 
-                sub_norms = np.hstack(self.win.trees.subtractive_parameters['Normalization'])[in_indicies]
-                sub_names = np.hstack(self.win.trees.subtractive_parameters['Names'])[in_indicies]
+                self.win.jobs.start('Compiling Shard ' + str(shard[0]) + '/' + str(shard[1]), partial(self.partial_job, add_names, sub_names, self.win.AddRotationalSlider.value(), \
+                                    self.win.SubRotationalSlider.value(), compile_norms, compile_cycles, mul_img, path, shard, total, cycles, singles, multiplicative), \
+                                    reads = reads, writes = (self.output_name(path),))
 
-                compile_norms = -sub_norms + compile_norms
+                return
 
-                avg_compile_norm = np.average(compile_norms)
+            self.win.jobs.start('Compiling Images', partial(self.compile_job, add_names, sub_names, self.win.AddRotationalSlider.value(), self.win.SubRotationalSlider.value(), \
+                                compile_norms, compile_cycles, mul_img, path, total, cycles, singles, self.win.workers.compile_processes), \
+                                reads = reads, writes = (self.output_name(path),))
 
-            self.win.FileProgressBar.setValue(0)
-            self.win.FileProgressBar.setMaximum(len(in_indicies[0]))
+    #Background job of compile_set.
+    #=============================================================
+    def compile_job(self, add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, total, cycles, singles, processes, job):
 
-            pool = Pool(cpu_count())
-            for count, results in enumerate(pool.imap_unordered(partial(self.compile_image, add_names, sub_names, compile_norms, avg_compile_norm), range(len(in_indicies[0])))):
+        if processes > 0:
 
-                if count == 0:
+            compile_images_processes(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, \
+                                     total, cycles, singles, processes, job.report)
 
-                    total_img = results[1]
+        else:
 
-                else:
+            compile_images(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, \
+                           total, cycles, singles, self.win.workers.imap_unordered, job.report, self.win.workers.cpu_imap)
 
-                    total_img += results[1]
-                
-                self.win.FileProgressBar.setValue(count + 1)
+    #Background job of compile_set for a single shard, saves its
+    #partial result (see src.Engine).
+    #=============================================================
+    def partial_job(self, add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, shard, total, cycles, singles, multiplicative, job):
 
-                if single_check == True:
-                    
-                    self.save_image(self.win.FolderBox.text() + '/' + self.win.NameBox.text() + '_Item_' + str(results[0]) + '.tiff', results[1] / mul_img)
+        compile_partial(add_names, sub_names, add_rotation, sub_rotation, compile_norms, compile_cycles, mul_img, path, shard[0], shard[1], \
+                        total, cycles, singles, multiplicative, self.win.workers.imap_unordered, job.report, self.win.workers.cpu_imap)
 
-            pool.close()
-            pool.join()
+    #Asks for the number of shards and the shard to compile, then
+    #compiles the partial result of that shard. The merge writes the
+    #total image, and the cycle images if there is more than one cycle.
+    #=============================================================
+    def save_partial(self):
 
-            self.win.FileProgressBar.setValue(0)
+        shards, accepted = QInputDialog.getInt(self.win, 'Compile Image Shard', 'Number of shards:', 2, 1, 4096)
 
-            if single_check == False:
-                
-                self.save_image(self.win.FolderBox.text() + '/' + self.win.NameBox.text() + '.tiff', total_img / mul_img)
+        if accepted == True:
 
-    def save_cycles(self):
+            shard, accepted = QInputDialog.getInt(self.win, 'Compile Image Shard', 'Shard to compile (0 to ' + str(shards - 1) + '):', 0, 0, shards - 1)
 
-        if self.win.AddImageNameTree.topLevelItemCount() != 0 or self.win.SubImageNameTree.topLevelItemCount() != 0:
+        if accepted == True:
 
-            mul_img = self.load_correction()
+            self.compile_set(total = True, cycles = int(self.win.CyclesBox.text()) > 1, shard = (shard, shards))
 
-            #==================================================================
-            compile_norms = np.ones((self.win.CyclesBox.value(), 1))
+    #Browse for the partial results of every shard of a compile and
+    #merge them into its total and cycle images, saved to the output
+    #folder, or where the shards were compiled if none is set.
+    #=============================================================
+    def merge_partial(self):
 
-            if self.win.AddImageNameTree.topLevelItemCount() != 0:
+        fileBrowse = QFileDialog()
+        fileBrowse.setViewMode(QFileDialog.Detail)
 
-                in_indicies = [np.where(self.win.trees.additive_parameters['Accepted'][i] == True) for i in range(self.win.CyclesBox.value())]
+        names = fileBrowse.getOpenFileNames(self.win, 'Load Partial Results', '', "Partial Results (*.npz)")[0]
 
-                add_norms = [self.win.trees.additive_parameters['Normalization'][i][in_indicies[i]] for i in range(self.win.CyclesBox.value())]
-                add_names = [self.win.trees.additive_parameters['Names'][i][in_indicies[i]] for i in range(self.win.CyclesBox.value())]
+        if len(names) != 0:
 
-                compile_norms = [add_norms[i] + compile_norms[i] for i in range(self.win.CyclesBox.value())]
+            path = os.path.join(self.win.FolderBox.text(), self.win.NameBox.text()) if self.win.FolderBox.text() != '' else None
 
-                avg_compile_norm = [np.average(compile_norms[i]) for i in range(self.win.CyclesBox.value())]
+            if path is None:
 
-            if self.win.SubImageNameTree.topLevelItemCount() != 0:
+                try:
 
-                in_indicies = [np.where(self.win.trees.subtractive_parameters['Accepted'][i] == True) for i in range(self.win.CyclesBox.value())]
+                    with np.load(names[0]) as partial_result:
 
-                sub_norms = [self.win.trees.subtractive_parameters['Normalization'][i][in_indicies[i]] for i in range(self.win.CyclesBox.value())]
-                sub_names = [self.win.trees.subtractive_parameters['Names'][i][in_indicies[i]] for i in range(self.win.CyclesBox.value())]
+                        output = str(partial_result['path'])
 
-                compile_norms = [sub_norms[i] + compile_norms[i] for i in range(self.win.CyclesBox.value())]
+                except (OSError, KeyError, ValueError) as error:
 
-                avg_compile_norm = [np.average(compile_norms[i]) for i in range(self.win.CyclesBox.value())]
+                    self.win.messaging.error_message('Invalid Partial Result', str(error))
 
-            #==================================================================
+                    return
 
-            self.win.FileProgressBar.setValue(0)
-            self.win.FileProgressBar.setMaximum(len(np.hstack(compile_norms)))
+            else:
 
-            total_count = 0
-            for cycle in range(self.win.CyclesBox.value()):
+                output = path
 
-                pool = Pool(cpu_count())
-                for count, results in enumerate(pool.imap_unordered(partial(self.compile_image, add_names[cycle], sub_names[cycle], compile_norms[cycle], avg_compile_norm[cycle]), range(len(in_indicies[cycle][0])))):
+            self.win.jobs.start('Merging Partial Results', partial(self.merge_job, names, path), writes = (self.output_name(output),))
 
-                    if count == 0:
+    #Background job of merge_partial.
+    #=============================================================
+    def merge_job(self, names, path, job):
 
-                        total_img = results
+        merge_partials(names, path, job.report)
 
-                    else:
+    #Name of a compile output written by a job, so that jobs writing
+    #the same images are run one after another.
+    #=============================================================
+    def output_name(self, path):
 
-                        total_img += results
-                    
-                    del results
+        return os.path.normpath(os.path.abspath(path))
 
-                    total_count += 1
+    def save_total(self, single_check = False):
 
-                    self.win.FileProgressBar.setValue(total_count + 1)
+        self.compile_set(total = not single_check, singles = single_check)
+
+    def save_cycles(self):
 
-                pool.close()
-                pool.join()
+        self.compile_set(total = False, cycles = True)
 
-                self.save_image(self.win.FolderBox.text() + '/' + self.win.NameBox.text() + '_Cycle_' + str(cycle) + '.tiff', total_img / mul_img)
+    def save_all(self):
 
-            self.win.FileProgressBar.setValue(0)
\ No newline at end of file
+        self.compile_set(total = True, cycles = True, singles = True)
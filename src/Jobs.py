@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Jobs
+
+This script runs the long operations of the application (loading an
+image set, compiling images and stacking or compiling traces) as
+background jobs, so the window stays responsive while they run. A
+job runs on its own thread and reports its progress, partial results
+and result back to the GUI thread through signals.
+
+Each job names the image sets or outputs it reads and writes, a job
+is refused while another job writes what it reads or writes, or
+reads what it writes. Running jobs can be paused and canceled from
+the Jobs menu, a job only stops at the points where it reports its
+progress.
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+from PySide6.QtGui import QAction, QKeySequence
+from PySide6.QtWidgets import QMenu
+
+#Number of jobs that may run at the same time
+MAX_JOBS = 4
+
+class JobCanceled(Exception):
+    '''
+    Raised inside a job at its next progress report once it is canceled.
+    '''
+
+class Job(QObject):
+    '''
+    A single background job. The job function is called as func(job) on
+    a worker thread and must only touch the GUI through the signals of
+    the job, which are delivered on the GUI thread.
+    '''
+
+    progress = Signal(object, int, int)
+    partial = Signal(object, object)
+    result = Signal(object, object)
+    failed = Signal(object, object)
+    done = Signal(object)
+
+    def __init__(self, name, func, reads = (), writes = ()):
+        '''
+        Creates a job that is not yet started, "reads" and "writes" name
+        the image sets or outputs the job uses.
+        '''
+
+        super().__init__()
+
+        self.name = name
+        self.func = func
+        self.reads = set(reads)
+        self.writes = set(writes)
+
+        self.canceled = threading.Event()
+        self.running = threading.Event()
+        self.running.set()
+
+    def conflicts(self, reads, writes):
+        '''
+        Returns True if a job reading and writing the given names cannot
+        run alongside this job.
+        '''
+
+        return len(set(writes) & (self.reads | self.writes)) != 0 or len(set(reads) & self.writes) != 0
+
+    def cancel(self):
+        '''
+        Cancels the job, a paused job is resumed so that it can stop.
+        '''
+
+        self.canceled.set()
+        self.running.set()
+
+    def pause(self, paused):
+        '''
+        Pauses or resumes the job.
+        '''
+
+        if paused == True:
+
+            self.running.clear()
+
+        else:
+
+            self.running.set()
+
+    def check(self):
+        '''
+        Called by the job function between units of work, blocks while
+        the job is paused and raises JobCanceled once it is canceled.
+        '''
+
+        self.running.wait()
+
+        if self.canceled.is_set() == True:
+
+            raise JobCanceled()
+
+    def report(self, value, maximum):
+        '''
+        Reports the progress of the job, then checks for a pause or cancel.
+        '''
+
+        self.progress.emit(self, value, maximum)
+        self.check()
+
+    def send(self, value):
+        '''
+        Sends a partial result of the job to the GUI thread.
+        '''
+
+        self.partial.emit(self, value)
+
+class JobRunner(QRunnable):
+    '''
+    Runs a job on a thread of the job thread pool.
+    '''
+
+    def __init__(self, job):
+
+        super().__init__()
+
+        self.job = job
+
+    def run(self):
+
+        try:
+
+            result = self.job.func(self.job)
+
+        except JobCanceled:
+
+            pass
+
+        except Exception as error:
+
+            self.job.failed.emit(self.job, error)
+
+        else:
+
+            if self.job.canceled.is_set() == False:
+
+                self.job.result.emit(self.job, result)
+
+        finally:
+
+            self.job.done.emit(self.job)
+
+class Jobs(QObject):
+    '''
+    This class deals with the starting, pausing and canceling of the
+    background jobs, and shows the progress of the latest job in the
+    progress bar.
+    '''
+
+    def __init__(self, win):
+        '''
+        Creates the job thread pool and the Jobs menu.
+        '''
+
+        super().__init__(win)
+
+        self.win = win
+
+        #=========================================
+        #                  Data
+        #=========================================
+
+        self.running = []
+        self.callbacks = {}
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(MAX_JOBS)
+
+        #=========================================
+        #                  Menu
+        #=========================================
+
+        self.win.menuJobs = QMenu('Jobs', self.win.menuBar)
+        self.win.actionCancelJobs = QAction('Cancel Jobs', self.win)
+        self.win.actionPauseJobs = QAction('Pause Jobs', self.win)
+
+        self.win.actionCancelJobs.setShortcut(QKeySequence('Esc'))
+        self.win.actionPauseJobs.setCheckable(True)
+
+        self.win.menuJobs.addAction(self.win.actionCancelJobs)
+        self.win.menuJobs.addAction(self.win.actionPauseJobs)
+        self.win.menuBar.insertMenu(self.win.menuHelp.menuAction(), self.win.menuJobs)
+
+        self.update_actions()
+
+        #=========================================
+        #             Event Handeling
+        #=========================================
+
+        self.win.actionCancelJobs.triggered.connect(lambda: self.cancel())
+        self.win.actionPauseJobs.toggled.connect(self.pause)
+
+    def available(self, reads = (), writes = ()):
+        '''
+        Returns True if a job reading and writing the given names may be
+        started, otherwise tells the user which job is in the way.
+        '''
+
+        for job in self.running:
+
+            if job.conflicts(reads, writes) == True:
+
+                self.win.messaging.error_message('Job in Progress', job.name + ' must finish or be canceled before continuing!')
+
+                return False
+
+        return True
+
+    def start(self, name, func, callback = None, partial_callback = None, reads = (), writes = (), done_callback = None):
+        '''
+        Starts "func(job)" as a background job unless it conflicts with a
+        running job. "callback" receives the result of the job and
+        "partial_callback" each partial result, "done_callback" is called
+        once the job has finished, failed or been canceled, all on the GUI
+        thread. Returns the job, or None if it was refused.
+        '''
+
+        if self.available(reads, writes) == False:
+
+            return None
+
+        job = Job(name, func, reads, writes)
+
+        job.progress.connect(self.job_progress)
+        job.partial.connect(self.job_partial)
+        job.result.connect(self.job_result)
+        job.failed.connect(self.job_failed)
+        job.done.connect(self.job_done)
+
+        self.callbacks[job] = (callback, partial_callback, done_callback)
+        self.running.append(job)
+
+        job.pause(self.win.actionPauseJobs.isChecked())
+
+        self.win.FileProgressBar.setValue(0)
+        self.update_actions()
+
+        self.pool.start(JobRunner(job))
+
+        return job
+
+    def cancel(self, name = None):
+        '''
+        Cancels the running jobs writing "name", or every running job.
+        Returns True if a job was canceled.
+        '''
+
+        canceled = False
+
+        for job in self.running:
+
+            if name is None or name in job.writes:
+
+                job.cancel()
+                canceled = True
+
+        return canceled
+
+    def pause(self, paused):
+        '''
+        Pauses or resumes every running job.
+        '''
+
+        for job in self.running:
+
+            job.pause(paused)
+
+    def update_actions(self):
+        '''
+        Enables the Jobs menu actions while a job is running.
+        '''
+
+        self.win.actionCancelJobs.setEnabled(len(self.running) != 0)
+        self.win.actionPauseJobs.setEnabled(len(self.running) != 0)
+
+        if len(self.running) == 0:
+
+            self.win.actionPauseJobs.setChecked(False)
+
+    def close(self):
+        '''
+        Cancels the running jobs and waits for them to stop.
+        '''
+
+        self.cancel()
+        self.pool.waitForDone()
+
+    @Slot(object, int, int)
+    def job_progress(self, job, value, maximum):
+
+        if len(self.running) != 0 and job is self.running[-1]:
+
+            self.win.FileProgressBar.setMaximum(max(1, maximum))
+            self.win.FileProgressBar.setValue(value)
+
+    @Slot(object, object)
+    def job_partial(self, job, value):
+
+        if self.callbacks[job][1] is not None and job.canceled.is_set() == False:
+
+            self.callbacks[job][1](value)
+
+    @Slot(object, object)
+    def job_result(self, job, value):
+
+        if self.callbacks[job][0] is not None:
+
+            self.callbacks[job][0](value)
+
+    @Slot(object, object)
+    def job_failed(self, job, error):
+
+        self.win.messaging.error_message(job.name + ' Failed', str(error))
+
+    @Slot(object)
+    def job_done(self, job):
+
+        self.running.remove(job)
+        done_callback = self.callbacks.pop(job)[2]
+
+        if len(self.running) == 0:
+
+            self.win.FileProgressBar.setValue(0)
+            self.win.workers.retire_pools()
+
+        self.update_actions()
+
+        if done_callback is not None:
+
+            done_callback()
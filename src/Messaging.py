@@ -10,7 +10,7 @@
 
 from Resources.UI.About_Window import Ui_about_dialog
 
-from PySide6.QtWidgets import QMessageBox, QDialog
+from PySide6.QtWidgets import QMessageBox, QDialog, QDialogButtonBox, QFormLayout, QSpinBox
 
 class Messaging:
 
@@ -93,4 +93,61 @@ class Messaging:
 
         self.win.setDisabled(False)
         about_window.close()
-        self.win.setFocus()
\ No newline at end of file
+        self.win.setFocus()
+
+    #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<
+    #                        Preferences Window
+    #<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<
+
+    class Preferences_Popup(QDialog):
+
+        def __init__(self, parent):
+            """
+            Generates the preferences pop-up, which sets the number of
+            threads reading images (I/O), the number of workers for
+            numerical work (CPU) and the number of processes compiling
+            images (0 compiles on the I/O threads).
+
+            :parent: The main window, provides access to the workers.
+            :return: None
+            """
+
+            super().__init__(parent)
+
+            self.setWindowTitle('Preferences')
+            self.setStyleSheet("background-color: rgb(49, 63, 80);color:white;")
+
+            self.io_box, self.cpu_box = QSpinBox(self), QSpinBox(self)
+            self.io_box.setRange(1, 512), self.cpu_box.setRange(1, 512)
+            self.io_box.setValue(parent.workers.io_threads), self.cpu_box.setValue(parent.workers.cpu_workers)
+            self.io_box.setToolTip('Number of threads reading images, raise for network or parallel file systems.')
+            self.cpu_box.setToolTip('Number of workers for numerical work, usually the number of cores.')
+
+            self.compile_box = QSpinBox(self)
+            self.compile_box.setRange(0, 512)
+            self.compile_box.setValue(parent.workers.compile_processes)
+            self.compile_box.setToolTip('Number of processes compiling images, 0 compiles on the I/O threads.')
+
+            self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+            self.buttons.accepted.connect(self.accept)
+            self.buttons.rejected.connect(self.reject)
+
+            layout = QFormLayout(self)
+            layout.addRow('I/O Threads', self.io_box)
+            layout.addRow('CPU Workers', self.cpu_box)
+            layout.addRow('Compile Processes', self.compile_box)
+            layout.addRow(self.buttons)
+
+    def open_preferences_window(self):
+        """
+        Displays the preferences pop-up, the worker pools are resized
+        when the pop-up is accepted.
+
+        :return: None
+        """
+
+        preferences_window = self.Preferences_Popup(self.win)
+
+        if preferences_window.exec() == QDialog.Accepted:
+
+            self.win.workers.set_limits(preferences_window.io_box.value(), preferences_window.cpu_box.value(), preferences_window.compile_box.value())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Models
+
+This script holds the item model shown by the additive, subtractive
+and total image trees. The model reads the columns of an image set
+directly, so the tree view only asks for the rows it draws and no
+item is created per image. The cycles are the top level rows and
+the images of each cycle are their children, the foreground colour
+of an image is read from the acceptance mask of the set.
+
+When only the acceptance mask changes the model compares it against
+the mask last shown and repaints the images that flipped, so the
+scroll position, expanded cycles and selection of the view are kept.
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import os
+import numpy as np
+
+from PySide6.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PySide6.QtGui import QBrush, QColor
+
+from src.Sets import ImageSet
+
+#Foreground of the accepted and rejected images
+ACCEPTED_BRUSH = QBrush(QColor(225, 225, 225, 255))
+REJECTED_BRUSH = QBrush(QColor('gold'))
+
+class ImageSetModel(QAbstractItemModel):
+    '''
+    Two level item model over an image set. The internal id of a cycle
+    row is 0 and the internal id of an image row is its cycle plus one,
+    so the parent of any row is known without storing items.
+    '''
+
+    def __init__(self, title, total = False, parent = None):
+        '''
+        Creates an empty model, "title" is shown in the header and is
+        used to identify the tree an index belongs to. The total image
+        tree labels each image by its position in the set rather than
+        by its file name.
+        '''
+
+        super().__init__(parent)
+
+        self.title = title
+        self.total = total
+        self.image_set = ImageSet()
+
+        self.accepted = np.copy(self.image_set.accepted)
+        self.offsets = np.copy(self.image_set.offsets)
+
+    def set_image_set(self, image_set):
+        '''
+        Shows the given image set, the view is reset and requests the
+        rows it draws from the new set.
+        '''
+
+        self.beginResetModel()
+        self.image_set = image_set
+        self.accepted = np.copy(image_set.accepted)
+        self.offsets = np.copy(image_set.offsets)
+        self.endResetModel()
+
+    def refresh(self):
+        '''
+        Repaints the images whose acceptance changed since the mask was
+        last shown, one dataChanged range per cycle containing a change.
+        Returns False without updating the view if the images or cycles
+        of the set changed, in which case the model must be reset.
+        '''
+
+        if len(self.accepted) != len(self.image_set) or np.array_equal(self.offsets, self.image_set.offsets) == False:
+
+            return False
+
+        flipped = np.flatnonzero(self.accepted != self.image_set.accepted)
+
+        if len(flipped) != 0:
+
+            cycles = np.searchsorted(self.offsets, flipped, side = 'right') - 1
+            starts = np.flatnonzero(np.diff(cycles, prepend = -1))
+            stops = np.append(starts[1:], len(flipped)) - 1
+
+            for start, stop in zip(starts, stops):
+
+                parent = self.index(int(cycles[start]), 0)
+
+                self.dataChanged.emit(self.index(int(flipped[start] - self.offsets[cycles[start]]), 0, parent), \
+                                      self.index(int(flipped[stop] - self.offsets[cycles[start]]), 0, parent), [Qt.ForegroundRole])
+
+            np.copyto(self.accepted, self.image_set.accepted)
+
+        return True
+
+    def clear(self):
+        '''
+        Removes all rows from the model.
+        '''
+
+        self.set_image_set(ImageSet())
+
+    def index(self, row, column, parent = QModelIndex()):
+
+        if self.hasIndex(row, column, parent) == False:
+
+            return QModelIndex()
+
+        if parent.isValid() == False:
+
+            return self.createIndex(row, column, 0)
+
+        return self.createIndex(row, column, parent.row() + 1)
+
+    def parent(self, index):
+
+        if index.isValid() == False or index.internalId() == 0:
+
+            return QModelIndex()
+
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent = QModelIndex()):
+
+        if parent.isValid() == False:
+
+            return self.image_set.cycles if len(self.image_set) != 0 else 0
+
+        if parent.internalId() == 0 and parent.column() == 0:
+
+            return int(self.image_set.offsets[parent.row() + 1] - self.image_set.offsets[parent.row()])
+
+        return 0
+
+    def columnCount(self, parent = QModelIndex()):
+
+        return 1
+
+    def data(self, index, role = Qt.DisplayRole):
+
+        if index.isValid() == False:
+
+            return None
+
+        if index.internalId() == 0:
+
+            if role == Qt.DisplayRole:
+
+                return 'Cycle_' + str(index.row())
+
+            return None
+
+        position = self.image_set.index(index.internalId() - 1, index.row())
+
+        if role == Qt.DisplayRole:
+
+            return 'Image_' + str(position) if self.total == True else os.path.basename(self.image_set.names[position])
+
+        elif role == Qt.ForegroundRole:
+
+            return ACCEPTED_BRUSH if self.image_set.accepted[position] == True else REJECTED_BRUSH
+
+        return None
+
+    def headerData(self, section, orientation, role = Qt.DisplayRole):
+
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+
+            return self.title
+
+        elif orientation == Qt.Horizontal and role == Qt.TextAlignmentRole:
+
+            return Qt.AlignCenter
+
+        return None
@@ -18,13 +18,32 @@ from functools import partial
 
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QVBoxLayout, QLabel, QFrame, QLineEdit, QGridLayout
-from PySide6.QtCore import QSize, QRect, QEventLoop, QTimer
+from PySide6.QtCore import QSize, QRect, QEventLoop, QTimer, QObject, Signal
 from PySide6.QtGui import QIcon, QAction
 
-from multiprocessing.pool import ThreadPool as Pool
-from multiprocessing import cpu_count 
-
 from matplotlib.backends.backend_qt5agg import  NavigationToolbar2QT as NavigationToolbar
+from matplotlib.ticker import StrMethodFormatter
+from matplotlib.transforms import nonsingular
+from matplotlib.collections import LineCollection
+
+from src.Display import display_cache, image_pyramid, pyramid_view, PYRAMID_MIN_SIZE
+from src.Engine import accepted_parameters, stack_traces, stack_total_traces, compile_traces, compile_total_traces
+
+#Number of visible images above which a PixPlot draws the accepted
+#images as a min/max envelope per pixel column rather than markers
+DENSITY_POINTS = 20000
+
+#Default colour bounds of the PixMap, in standard deviations about
+#the mean or as lower and upper percentiles
+STD_BOUNDS = ('1', '1')
+PERCENTILE_BOUNDS = ('1', '99')
+
+#Carries a finished image pyramid from the CPU pool back to the
+#GUI thread, its slots are connected as queued connections.
+#=============================================================
+class PyramidSignals(QObject):
+
+    ready = Signal(object, object)
 
 #+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 #                        ImagePlot
@@ -70,12 +89,12 @@ class Image:
         self.win.stdminBox.setFixedSize(59, 23), self.win.stdmaxBox.setFixedSize(59, 23)
         self.win.stdminBox.setAlignment(Qt.AlignHCenter), self.win.stdmaxBox.setAlignment(Qt.AlignHCenter) 
         
-        self.win.stdBox = QAction(QIcon(':/Images/Resources/Icons/Standard_Deviation.png'), 'Reset View', self.win)
+        self.win.stdBox = QAction(QIcon(':/Images/Resources/Icons/Standard_Deviation.png'), 'Percentile Scale', self.win)
         self.win.edgeButton = QAction(QIcon(':/Images/Resources/Icons/Edge.png'), 'Edge Detection', self.win)
         self.win.linesegButton = QAction(QIcon(':/Images/Resources/Icons/Line.png'), 'Plot Line Segment', self.win)
         self.win.resetButton = QAction(QIcon(':/Images/Resources/Icons/Reset.png'), 'Reset View', self.win)
         
-        self.win.stdBox.setEnabled(False), self.win.edgeButton.setCheckable(True), self.win.linesegButton.setCheckable(True)
+        self.win.stdBox.setCheckable(True), self.win.edgeButton.setCheckable(True), self.win.linesegButton.setCheckable(True)
         
         self.win.image_toolbar_View.addAction(self.win.edgeButton)
         self.win.image_toolbar_View.addAction(self.win.linesegButton)
@@ -96,74 +115,202 @@ class Image:
         self.win.imagematplotFrame.setLayout(layout)
         self.win.image_view.axes.set(xticks = [], yticks = [])
         
+        self.win.pixmap_image, self.win.pixmap_artist, self.win.pixmap_stats = None, None, None
+        self.win.pixmap_levels, self.win.pixmap_callbacks, self.win.pyramid_image = [], [], None
+        self.win.pixmap_render_pending = False
+
+        self.win.pyramid_signals = PyramidSignals()
+        self.win.pyramid_signals.ready.connect(self.pyramid_ready, Qt.QueuedConnection)
+        self.win.image_view.mpl_connect('resize_event', lambda event: self.schedule_render())
+
         self.win.stdminBox.returnPressed.connect(self.color_bounds)
         self.win.stdmaxBox.returnPressed.connect(self.color_bounds)
         self.win.edgeButton.triggered.connect(self.edge_detection)
+        self.win.stdBox.triggered.connect(self.color_scale)
         self.win.resetButton.triggered.connect(self.reset_image)
         
     #Update the PixMap with the latest item/image, adjusts the color
-    #scale based on the standard deviations set in QLineEdit.
+    #scale based on the bounds set in QLineEdit. The PixMap holds a
+    #single AxesImage whose data is replaced, it is only recreated
+    #when the shape of the image changes. The display statistics of
+    #the image are estimated from a subsample and cached (src.Display)
+    #for later changes of the color scale. The image pyramid is built
+    #in the background, until it is ready the full image is drawn.
     #=============================================================
     def update_image(self, img):
         
-        self.win.pixmap_image = np.copy(img)
+        same_shape = self.win.pixmap_image is not None and np.shape(self.win.pixmap_image)[:2] == np.shape(img)[:2]
 
-        img_std = np.std(self.win.pixmap_image)
-        img_avg = np.average(self.win.pixmap_image)
+        self.win.pixmap_image = img
+        self.win.pixmap_stats = display_cache.get(img)
+        self.win.pixmap_levels = [img]
 
-        self.win.image_view.axes.cla()
-        self.win.image_view.axes.imshow(self.win.pixmap_image, origin = 'lower', cmap = 'cividis', vmin = img_avg - img_std * \
-                                   float(self.win.stdminBox.text()), vmax = img_avg + img_std * float(self.win.stdmaxBox.text()))
-        
-        self.win.image_view.axes.set(xticks = [], yticks = [])
-        self.win.image_view.draw()
+        if self.win.pixmap_artist is None or same_shape == False:
+
+            if self.win.pixmap_artist is not None:
+
+                self.win.pixmap_artist.remove()
+
+            else:
+
+                self.win.pixmap_callbacks = [self.win.image_view.axes.callbacks.connect(limit, lambda axes: self.schedule_render()) \
+                                             for limit in ('xlim_changed', 'ylim_changed')]
+
+            self.win.pixmap_artist = self.win.image_view.axes.imshow(img, origin = 'lower', cmap = 'cividis')
+            self.win.image_view.axes.set_autoscale_on(False)
+            self.win.image_view.axes.set_xlim(-0.5, np.shape(img)[1] - 0.5)
+            self.win.image_view.axes.set_ylim(-0.5, np.shape(img)[0] - 0.5)
+            self.win.image_view.axes.set(xticks = [], yticks = [])
+
+        self.render_view()
+        self.update_clim()
+        self.build_pyramid(img)
         self.win.show()
+
+    #Draws the part of the image pyramid in view, at the level
+    #matching the zoom of the PixMap and the size of the canvas. Full
+    #resolution pixels are only drawn when zoomed in.
+    #=============================================================
+    def render_view(self):
+
+        if self.win.pixmap_artist is not None:
+
+            bbox = self.win.image_view.axes.get_window_extent()
+            data, extent = pyramid_view(self.win.pixmap_levels, self.win.image_view.axes.get_xlim(), \
+                                        self.win.image_view.axes.get_ylim(), bbox.width, bbox.height)
+
+            self.win.pixmap_artist.set_data(data)
+            self.win.pixmap_artist.set_extent(extent)
+
+    #Schedules a single redraw of the PixMap view, a zoom or pan
+    #changes both axis limits but the view is only rendered once
+    #control returns to the event loop.
+    #=============================================================
+    def schedule_render(self):
+
+        if self.win.pixmap_render_pending == False:
+
+            self.win.pixmap_render_pending = True
+            QTimer.singleShot(0, self.pending_render)
+
+    #Renders the scheduled view of the PixMap and redraws it.
+    #=============================================================
+    def pending_render(self):
+
+        self.win.pixmap_render_pending = False
+        self.render_view()
+        self.win.image_view.draw_idle()
+
+    #Builds the image pyramid of the plotted image on the CPU pool,
+    #images too small for a second level need no pyramid. The finished
+    #pyramid is signalled back to the GUI thread.
+    #=============================================================
+    def build_pyramid(self, img):
+
+        if min(np.shape(img)[:2]) >= 2 * PYRAMID_MIN_SIZE:
+
+            self.win.pyramid_image = img
+            self.win.workers.cpu_pool.apply_async(image_pyramid, (img,), callback = partial(self.win.pyramid_signals.ready.emit, img))
+
+        else:
+
+            self.win.pyramid_image = None
+
+    #Once the image pyramid is built the PixMap is redrawn from the
+    #pyramid, if its image is still plotted.
+    #=============================================================
+    def pyramid_ready(self, img, levels):
+
+        if img is self.win.pyramid_image and img is self.win.pixmap_image:
+
+            self.win.pyramid_image = None
+            self.win.pixmap_levels = levels
+
+            self.render_view()
+            self.win.image_view.draw_idle()
+
+    #Sets the color scale of the PixMap from the cached statistics of
+    #the plotted image and the bounds set in QLineEdit, either the
+    #standard deviations about the mean or, in percentile mode, the
+    #lower and upper percentiles. The image data is left untouched.
+    #=============================================================
+    def update_clim(self):
+
+        if self.win.stdBox.isChecked() == True:
+
+            vmin, vmax = self.win.pixmap_stats.percentile_bounds(float(self.win.stdminBox.text()), float(self.win.stdmaxBox.text()))
+
+        else:
+
+            vmin, vmax = self.win.pixmap_stats.std_bounds(float(self.win.stdminBox.text()), float(self.win.stdmaxBox.text()))
+
+        self.win.pixmap_artist.set_clim(vmin, vmax)
+        self.win.image_view.draw_idle()
+
+    #Resets the bounds within QLineEdit to the defaults of the
+    #current color scale mode.
+    #=============================================================
+    def reset_color_bounds(self):
+
+        bounds = PERCENTILE_BOUNDS if self.win.stdBox.isChecked() == True else STD_BOUNDS
+
+        self.win.stdminBox.setText(bounds[0])
+        self.win.stdmaxBox.setText(bounds[1])
+
+    #Switches the color scale of the PixMap between standard
+    #deviation and percentile bounds, resetting the bounds within
+    #QLineEdit to the defaults of the new mode.
+    #=============================================================
+    def color_scale(self):
+
+        self.reset_color_bounds()
+
+        if bool(self.win.image_view.axes.get_images()) == True:
+
+            self.update_clim()
     
-    #Clears the Pixmap to a blank canvas and resets the standard
-    #deviation within QLineEdit.
+    #Clears the Pixmap to a blank canvas and resets the bounds
+    #within QLineEdit.
     #=============================================================
     def clear_image(self):
         
-        self.win.stdminBox.setText('1')
-        self.win.stdmaxBox.setText('1')
+        self.reset_color_bounds()
         
+        for callback in self.win.pixmap_callbacks: self.win.image_view.axes.callbacks.disconnect(callback)
+
         self.win.image_view.axes.clear()
+        self.win.pixmap_image, self.win.pixmap_artist, self.win.pixmap_stats = None, None, None
+        self.win.pixmap_levels, self.win.pixmap_callbacks, self.win.pyramid_image = [], [], None
         self.win.image_view.axes.set(xticks = [], yticks = [])
         self.win.image_view.draw()
         self.win.show()
 
     #Resets the PixMap to the initially selected item/image before
     #application of manipulative actions, additionally resets the
-    #standard deviations within QLineEdit.
+    #bounds within QLineEdit.
     #=============================================================
     def reset_image(self):
         
         if bool(self.win.image_view.axes.get_images()) == True:
             
-            self.win.stdminBox.setText('1')
-            self.win.stdmaxBox.setText('1')
+            self.reset_color_bounds()
 
             self.win.edgeButton.setChecked(False)
             self.update_image(self.win.selection.selection_parameters['Image'])
         
-    #Changes the colorbounds of the plotted PixMap when the standard
-    #deviations set in the QLineEdit are updated.
+    #Changes the colorbounds of the plotted PixMap when the bounds
+    #set in the QLineEdit are updated, only the color limits of the
+    #plotted image are changed.
     #=============================================================  
     def color_bounds(self):
         
         if bool(self.win.image_view.axes.get_images()) == True:
             
-            if self.win.edgeButton.isChecked() == False:
-
-                self.update_image(self.win.selection.selection_parameters['Image'])
-
-            else:
+            self.update_clim()
 
-                self.edge_detection()
         else:
             
-            self.win.stdminBox.setText('1')
-            self.win.stdmaxBox.setText('1')
+            self.reset_color_bounds()
             
     #Calculates and plots the 'Massif' extraction of the plotted
     #PixMap image. Highlights edge features in the image.
@@ -255,6 +402,9 @@ class Plot:
         self.win.AddPlotView.axes.set_xticklabels([0, 1, 2, 3, 4, 5, 6], fontsize = 8)
         self.win.AddPlotView.axes.set_ylabel('Additive Intensity', fontsize = 8)
         self.win.AddPlotView.axes.set_xlabel('Number of Images', fontsize = 8)
+
+        self.win.AddPlotView.pixplot = None
+        self.win.AddPlotView.mpl_connect('draw_event', lambda event: self.capture_background(self.win.AddPlotView))
         
         #=============================================================
         #                Generate Subtractive PixPlot
@@ -310,49 +460,166 @@ class Plot:
         self.win.SubPlotView.axes.set_xticklabels([0, 1, 2, 3, 4, 5, 6], fontsize = 8)
         self.win.SubPlotView.axes.set_ylabel('Subtractive Intensity', fontsize = 8)
         self.win.SubPlotView.axes.set_xlabel('Number of Images', fontsize = 8)
+
+        self.win.SubPlotView.pixplot = None
+        self.win.SubPlotView.mpl_connect('draw_event', lambda event: self.capture_background(self.win.SubPlotView))
         
-    #Updates the PixPlot to the latest mean data.
+    #Creates the persistent artists of a PixPlot, the accepted and
+    #rejected images, the standard deviation bounds and the selected
+    #image. The selected image is animated so that it can be moved
+    #by blitting it over the cached background of the PixPlot.
+    #=============================================================
+    def create_artists(self, canvas):
+
+        canvas.pixplot = {'Accepted': canvas.axes.scatter([], [], marker = 'o', c = 'mediumblue'),
+                          'Envelope': canvas.axes.add_collection(LineCollection([], colors = 'mediumblue', linewidths = 2, capstyle = 'projecting')),
+                          'Rejected': canvas.axes.scatter([], [], marker = 'o', c = 'gold'),
+                          'Upper': canvas.axes.axhline(0, color = 'black'),
+                          'Lower': canvas.axes.axhline(0, color = 'black'),
+                          'Selected': canvas.axes.scatter([], [], marker = 'o', c = 'deepskyblue', edgecolors = 'black', animated = True),
+                          'Norm': np.zeros(0),
+                          'Bounds': np.zeros(0, dtype = bool),
+                          'Background': None}
+
+        canvas.axes.set(yticks = [], yticklabels = [])
+        canvas.axes.xaxis.set_major_formatter(StrMethodFormatter('{x:,.0f}'))
+        canvas.axes.tick_params(axis = 'x', labelsize = 8)
+        canvas.axes.callbacks.connect('xlim_changed', lambda axes: self.render_visible(canvas))
+
+    #Updates the PixPlot to the latest mean data. The persistent
+    #artists are given the new offsets and bounds and the PixPlot
+    #is drawn once, no artists are recreated.
     #=============================================================
     def update_plot(self, canvas, norm, bounds, std_min_box, std_max_box):
 
-        bounds = np.hstack(bounds)
-        norm = np.hstack(norm)
-        
-        in_indicies = np.where(bounds == True)
-        out_indicies = np.where(bounds == False)
-        
-        ylabel_text = canvas.axes.get_ylabel()
-        label_format = '{:,.0f}'
+        bounds = np.asarray(bounds, dtype = bool)
+        norm = np.asarray(norm, dtype = float)
 
-        canvas.axes.cla()
-        canvas.axes.scatter(in_indicies, norm[in_indicies], marker = 'o', c = 'mediumblue')
-        canvas.axes.scatter(out_indicies, norm[out_indicies], marker = 'o', c = 'gold')
-        
-        if self.win.selection.selection_parameters['Total_Index'] != None:
+        if canvas.pixplot is None:
 
-            if self.win.selection.selection_parameters['Total_Index'] != None:
-            
-                canvas.axes.scatter(self.win.selection.selection_parameters['Total_Index'], norm[self.win.selection.selection_parameters['Total_Index']], marker = 'o', c = 'deepskyblue', edgecolors = 'black')
-                
-        plot_std = np.std(norm)
-        plot_avg = np.average(norm)
+            self.create_artists(canvas)
+
+        canvas.pixplot['Norm'] = norm
+        canvas.pixplot['Bounds'] = bounds
+
+        self.move_selected(canvas)
+
+        plot_std = np.std(norm) if len(norm) != 0 else 0.0
+        plot_avg = np.average(norm) if len(norm) != 0 else 0.0
+
+        canvas.axes.set_xlim(nonsingular(0, max(0, len(norm) - 1), expander = 0.5))
+        self.render_visible(canvas)
 
         if plot_avg - plot_std * float(std_min_box.text()) * 1.25 != plot_avg + plot_std * float(std_min_box.text()) * 1.25:
-            
-            canvas.axes.plot(np.full_like(norm, plot_avg + plot_std * float(std_max_box.text())), '-', color = 'black')
-            canvas.axes.plot(np.full_like(norm, plot_avg - plot_std * float(std_min_box.text())), '-', color = 'black')
+
+            canvas.pixplot['Upper'].set_ydata([plot_avg + plot_std * float(std_max_box.text())] * 2)
+            canvas.pixplot['Lower'].set_ydata([plot_avg - plot_std * float(std_min_box.text())] * 2)
+            canvas.pixplot['Upper'].set_visible(True), canvas.pixplot['Lower'].set_visible(True)
             canvas.axes.set_ylim([plot_avg - plot_std * float(std_min_box.text()) * 1.25, plot_avg + plot_std * float(std_max_box.text()) * 1.25])
-        
-        canvas.axes.set(yticks = [], yticklabels = [])
-        canvas.axes.set_xticks(canvas.axes.get_xticks().tolist()[1:-1])
-        canvas.axes.set_xticklabels([label_format.format(x) for x in canvas.axes.get_xticks().tolist()], fontsize = 8)
-        canvas.axes.set_ylabel(ylabel_text, fontsize = 8)
-        canvas.axes.set_xlabel('Number of Images', fontsize = 8)
-        canvas.axes.xaxis.label.set_color((0.89, 0.89, 0.89, 1.0))
-        canvas.axes.yaxis.label.set_color((0.89, 0.89, 0.89, 1.0))
+
+        else:
+
+            canvas.pixplot['Upper'].set_visible(False), canvas.pixplot['Lower'].set_visible(False)
+            canvas.axes.set_ylim(nonsingular(np.min(norm) if len(norm) != 0 else 0, np.max(norm) if len(norm) != 0 else 0, expander = 0.05))
+
         canvas.draw()
 
-            
+    #Renders the images within the visible range of the PixPlot, and
+    #is called again whenever the PixPlot is panned or zoomed. Up to
+    #DENSITY_POINTS accepted images are drawn as exact markers, beyond
+    #that they are reduced to the minimum and maximum of each pixel
+    #column of the axes. Rejected images stay markers, thinned to at
+    #most DENSITY_POINTS.
+    #=============================================================
+    def render_visible(self, canvas):
+
+        if canvas.pixplot is None:
+
+            return
+
+        norm, bounds = canvas.pixplot['Norm'], canvas.pixplot['Bounds']
+
+        x_min, x_max = canvas.axes.get_xlim()
+        start, stop = max(0, int(np.floor(min(x_min, x_max)))), min(len(norm), int(np.ceil(max(x_min, x_max))) + 1)
+        start = min(start, stop)
+
+        visible = np.arange(start, stop)
+        in_indicies = visible[bounds[start:stop]]
+        out_indicies = visible[~bounds[start:stop]]
+
+        if len(in_indicies) <= DENSITY_POINTS:
+
+            canvas.pixplot['Accepted'].set_offsets(np.column_stack((in_indicies, norm[in_indicies])))
+            canvas.pixplot['Envelope'].set_segments([])
+
+        else:
+
+            columns = max(1, int(canvas.axes.bbox.width))
+            edges = np.unique(np.linspace(start, stop, columns + 1).astype(np.int64))
+
+            values = np.where(bounds[start:stop], norm[start:stop], np.nan)
+            minimums = np.fmin.reduceat(values, edges[:-1] - start)
+            maximums = np.fmax.reduceat(values, edges[:-1] - start)
+
+            centres = (edges[:-1] + edges[1:] - 1) / 2
+            drawn = ~np.isnan(minimums)
+
+            canvas.pixplot['Accepted'].set_offsets(np.zeros((0, 2)))
+            canvas.pixplot['Envelope'].set_segments(np.stack((np.column_stack((centres, minimums)), np.column_stack((centres, maximums))), axis = 1)[drawn])
+
+        if len(out_indicies) > DENSITY_POINTS:
+
+            out_indicies = out_indicies[::int(np.ceil(len(out_indicies) / DENSITY_POINTS))]
+
+        canvas.pixplot['Rejected'].set_offsets(np.column_stack((out_indicies, norm[out_indicies])))
+
+    #Moves the selected image marker of the PixPlot to the selected
+    #image, or hides it if no image is selected.
+    #=============================================================
+    def move_selected(self, canvas):
+
+        index = self.win.selection.selection_parameters['Total_Index']
+
+        if index != None and index < len(canvas.pixplot['Norm']):
+
+            canvas.pixplot['Selected'].set_offsets([[index, canvas.pixplot['Norm'][index]]])
+
+        else:
+
+            canvas.pixplot['Selected'].set_offsets(np.zeros((0, 2)))
+
+    #Updates only the selected image marker of the PixPlot. The cached
+    #background is restored and the marker alone is blitted on top, so
+    #the accepted and rejected images are not redrawn.
+    #=============================================================
+    def update_selected(self, canvas):
+
+        if canvas.pixplot is None:
+
+            return
+
+        self.move_selected(canvas)
+
+        if canvas.pixplot['Background'] is not None:
+
+            canvas.restore_region(canvas.pixplot['Background'])
+            canvas.axes.draw_artist(canvas.pixplot['Selected'])
+            canvas.blit(canvas.axes.bbox)
+
+        else:
+
+            canvas.draw()
+
+    #Caches the background of the PixPlot after every full draw, the
+    #animated selected image marker is then drawn on top of it.
+    #=============================================================
+    def capture_background(self, canvas):
+
+        if canvas.pixplot is not None and canvas.is_saving() == False:
+
+            canvas.pixplot['Background'] = canvas.copy_from_bbox(canvas.axes.bbox)
+            canvas.axes.draw_artist(canvas.pixplot['Selected'])
+
     #Clears the PixPlot to a blank canvas.
     #=============================================================
     def clear_plot(self, canvas):
@@ -360,6 +627,7 @@ class Plot:
         ylabel_text = canvas.axes.get_ylabel()
         
         canvas.axes.clear()
+        canvas.pixplot = None
         canvas.axes.set(xticks = [0, 1, 2, 3, 4, 5, 6], yticks = [], yticklabels = [])
         canvas.axes.set_xticklabels([0, 1, 2, 3, 4, 5, 6], fontsize = 8)
         canvas.axes.set_ylabel(ylabel_text, fontsize = 8)
@@ -485,6 +753,13 @@ class Trace:
             if self.win.pixmapTabs.count() > 1:
                 
                 self.clear_trace()
+
+            elif hasattr(self.win, 'anchor_1') == True:
+
+                self.win.anchor_1.remove()
+                del self.win.anchor_1
+
+                self.win.image_view.draw()
         
     #Selecting points on the Pixmap, the first selected point is 
     #plotted. The second selected point is plotted and a trace is 
@@ -661,10 +936,16 @@ class Trace:
             
             if self.win.stackButton.isChecked() == True:
 
-                self.win.selectedButton.setChecked(False)
-                self.win.compileButton.setChecked(False)
-                self.clear_traceplot()
-                self.stack_plot()
+                if self.win.jobs.available(self.trace_reads(), ('Trace Plot',)) == False:
+
+                    self.win.stackButton.setChecked(False)
+
+                else:
+
+                    self.win.selectedButton.setChecked(False)
+                    self.win.compileButton.setChecked(False)
+                    self.clear_traceplot()
+                    self.stack_plot()
 
             elif self.win.stackButton.isChecked() == False:
 
@@ -675,107 +956,78 @@ class Trace:
             self.win.stackButton.setChecked(False)
             self.win.compileButton.setChecked(False)
 
-    
-    def compile_image(self, paths, norms, avg_norm, slider, index):
-
-        return index, np.rot90(self.win.files.load_image(paths[index]), -slider.value()) / norms[index] * avg_norm
 
+    #Snapshots the accepted images of the selected image QTreeWidget
+    #and stacks their traces on the TracePlot as a background job.
+    #=============================================================
     def stack_plot(self):
-        
-        if self.win.selection.selection_parameters['Type'] == 'Additive Images':
-
-            if self.win.AddImageNameTree.topLevelItemCount() != 0:
 
-                in_indicies = np.where(np.hstack(self.win.trees.additive_parameters['Accepted']) == True)
+        self.win.trees.flush_update()
 
-                add_norms = np.hstack(self.win.trees.additive_parameters['Normalization'])[in_indicies]
-                add_names = np.hstack(self.win.trees.additive_parameters['Names'])[in_indicies]
-
-                avg_norm = np.average(add_norms)
-
-            self.win.FileProgressBar.setValue(0)
-            self.win.FileProgressBar.setMaximum(len(in_indicies[0]))
-
-            pool = Pool(cpu_count())
-            for count, results in enumerate(pool.imap_unordered(partial(self.compile_image, add_names, add_norms, avg_norm, self.win.AddRotationalSlider), range(len(in_indicies[0])))):
-
-                self.win.traceView.axes.plot(results[1][self.win.line_y, self.win.line_x]) 
-
-                self.win.FileProgressBar.setValue(count + 1)
+        line_y, line_x = np.copy(self.win.line_y), np.copy(self.win.line_x)
+        
+        if self.win.selection.selection_parameters['Type'] == 'Additive Images':
 
-            pool.close()
-            pool.join()
+            add_names, add_norms = accepted_parameters(self.win.trees.additive_parameters)
 
-            self.win.FileProgressBar.setValue(0)
+            trace_job = partial(self.stack_traces, add_names, add_norms, self.win.AddRotationalSlider.value(), line_y, line_x)
 
         elif self.win.selection.selection_parameters['Type'] == 'Subtractive Images':
 
-            if self.win.SubImageNameTree.topLevelItemCount() != 0:
+            sub_names, sub_norms = accepted_parameters(self.win.trees.subtractive_parameters)
 
-                in_indicies = np.where(np.hstack(self.win.trees.subtractive_parameters['Accepted']) == True)
-
-                sub_norms = np.hstack(self.win.trees.subtractive_parameters['Normalization'])[in_indicies]
-                sub_names = np.hstack(self.win.trees.subtractive_parameters['Names'])[in_indicies]
-
-                avg_norm = np.average(sub_norms)
-
-            self.win.FileProgressBar.setValue(0)
-            self.win.FileProgressBar.setMaximum(len(in_indicies[0]))
-
-            pool = Pool(cpu_count())
-            for count, results in enumerate(pool.imap_unordered(partial(self.compile_image, sub_names, sub_norms, avg_norm, self.win.SubRotationalSlider), range(len(in_indicies[0])))):
-
-                self.win.traceView.axes.plot(results[1][self.win.line_y, self.win.line_x]) 
-
-                self.win.FileProgressBar.setValue(count + 1)
-
-            pool.close()
-            pool.join()
-
-            self.win.FileProgressBar.setValue(0)
+            trace_job = partial(self.stack_traces, sub_names, sub_norms, self.win.SubRotationalSlider.value(), line_y, line_x)
 
         elif self.win.selection.selection_parameters['Type'] == 'Total Images':
 
             mul_img = self.win.files.load_correction()
 
-            compile_norms, add_names, sub_names = np.ones((1)), np.ones((1)), np.ones((1))
-
-            if self.win.AddImageNameTree.topLevelItemCount() != 0:
+            add_names, sub_names, compile_norms, compile_cycles = self.win.files.compile_parameters()
 
-                in_indicies = np.where(np.hstack(self.win.trees.additive_parameters['Accepted']) == True)
+            trace_job = partial(self.stack_total_traces, add_names, sub_names, self.win.AddRotationalSlider.value(), self.win.SubRotationalSlider.value(), \
+                                compile_norms, mul_img, line_y, line_x)
 
-                add_norms = np.hstack(self.win.trees.additive_parameters['Normalization'])[in_indicies]
-                add_names = np.hstack(self.win.trees.additive_parameters['Names'])[in_indicies]
+        if self.win.jobs.start('Stacking Traces', trace_job, lambda result: self.format_traceplot(), self.plot_trace, \
+                               reads = self.trace_reads(), writes = ('Trace Plot',)) is None:
 
-                compile_norms = add_norms + compile_norms
-
-                avg_compile_norm = np.average(compile_norms)
+            self.win.stackButton.setChecked(False)
 
-            if self.win.SubImageNameTree.topLevelItemCount() != 0:
+    #Image sets read by the background jobs of the TracePlot.
+    #=============================================================
+    def trace_reads(self):
 
-                in_indicies = np.where(np.hstack(self.win.trees.subtractive_parameters['Accepted']) == True)
+        return (self.win.AddImageNameTree.model().title, self.win.SubImageNameTree.model().title)
 
-                sub_norms = np.hstack(self.win.trees.subtractive_parameters['Normalization'])[in_indicies]
-                sub_names = np.hstack(self.win.trees.subtractive_parameters['Names'])[in_indicies]
+    #Background job of stack_plot, sends the trace of each accepted
+    #image of the additive or subtractive images (see src.Engine).
+    #=============================================================
+    def stack_traces(self, names, norms, rotation, line_y, line_x, job):
 
-                compile_norms = -sub_norms + compile_norms
+        for trace in stack_traces(names, norms, rotation, line_y, line_x, self.win.workers.imap_unordered, job.report):
 
-                avg_compile_norm = np.average(compile_norms)
+            job.send(trace)
 
-            self.win.FileProgressBar.setValue(0)
-            self.win.FileProgressBar.setMaximum(len(in_indicies[0]))
+    #Background job of stack_plot, sends the trace of each accepted
+    #image of the total images (see src.Engine).
+    #=============================================================
+    def stack_total_traces(self, add_names, sub_names, add_rotation, sub_rotation, compile_norms, mul_img, line_y, line_x, job):
 
-            pool = Pool(cpu_count())
-            for count, results in enumerate(pool.imap_unordered(partial(self.win.files.compile_image, add_names, sub_names, compile_norms, avg_compile_norm), range(len(in_indicies[0])))):
+        for trace in stack_total_traces(add_names, sub_names, add_rotation, sub_rotation, compile_norms, mul_img, line_y, line_x, \
+                                        self.win.workers.imap_unordered, job.report, self.win.workers.cpu_imap):
 
-                self.win.traceView.axes.plot((results[1] / mul_img)[self.win.line_y, self.win.line_x])
+            job.send(trace)
 
-                self.win.FileProgressBar.setValue(count + 1)
+    #Plots a single trace on the TracePlot.
+    #=============================================================
+    def plot_trace(self, trace):
 
-            pool.close()
-            pool.join()
+        self.win.traceView.axes.plot(trace)
+        self.win.traceView.draw_idle()
 
-            self.win.FileProgressBar.setValue(0)
+    #Sets the limits and labels of the TracePlot once its traces
+    #are plotted.
+    #=============================================================
+    def format_traceplot(self):
 
         self.win.traceView.axes.set(xticks = [], xticklabels = [], yticks = [], yticklabels = [])
         self.win.traceView.axes.set_ylim([self.win.traceView.axes.get_ylim()[0] - self.win.traceView.axes.get_ylim()[1] * 0.025, self.win.traceView.axes.get_ylim()[1] * 1.05])
@@ -797,10 +1049,16 @@ class Trace:
             
             if self.win.compileButton.isChecked() == True:
 
-                self.win.selectedButton.setChecked(False)
-                self.win.stackButton.setChecked(False)
-                self.clear_traceplot()
-                self.compile_plot()
+                if self.win.jobs.available(self.trace_reads(), ('Trace Plot',)) == False:
+
+                    self.win.compileButton.setChecked(False)
+
+                else:
+
+                    self.win.selectedButton.setChecked(False)
+                    self.win.stackButton.setChecked(False)
+                    self.clear_traceplot()
+                    self.compile_plot()
 
             elif self.win.compileButton.isChecked() == False:
 
@@ -815,127 +1073,54 @@ class Trace:
     #and plot the compilation on the TracePlot.
     #=============================================================
     def compile_plot(self):
-        
-        if self.win.selection.selection_parameters['Type'] == 'Additive Images':
-
-            if self.win.AddImageNameTree.topLevelItemCount() != 0:
-
-                in_indicies = np.where(np.hstack(self.win.trees.additive_parameters['Accepted']) == True)
-
-                add_norms = np.hstack(self.win.trees.additive_parameters['Normalization'])[in_indicies]
-                add_names = np.hstack(self.win.trees.additive_parameters['Names'])[in_indicies]
-
-                avg_norm = np.average(add_norms)
-
-            self.win.FileProgressBar.setValue(0)
-            self.win.FileProgressBar.setMaximum(len(in_indicies[0]))
-
-            pool = Pool(cpu_count())
-            for count, results in enumerate(pool.imap_unordered(partial(self.compile_image, add_names, add_norms, avg_norm, self.win.AddRotationalSlider), range(len(in_indicies[0])))):
 
-                if count == 0:
+        self.win.trees.flush_update()
 
-                    total_img = results[1]
-
-                else:
-
-                    total_img += results[1]
-
-                self.win.FileProgressBar.setValue(count + 1)
+        line_y, line_x = np.copy(self.win.line_y), np.copy(self.win.line_x)
+        
+        if self.win.selection.selection_parameters['Type'] == 'Additive Images':
 
-            pool.close()
-            pool.join()
+            add_names, add_norms = accepted_parameters(self.win.trees.additive_parameters)
 
-            self.win.FileProgressBar.setValue(0)
+            trace_job = partial(self.compile_traces, add_names, add_norms, self.win.AddRotationalSlider.value(), line_y, line_x)
 
         elif self.win.selection.selection_parameters['Type'] == 'Subtractive Images':
 
-            if self.win.SubImageNameTree.topLevelItemCount() != 0:
-
-                in_indicies = np.where(np.hstack(self.win.trees.subtractive_parameters['Accepted']) == True)
+            sub_names, sub_norms = accepted_parameters(self.win.trees.subtractive_parameters)
 
-                sub_norms = np.hstack(self.win.trees.subtractive_parameters['Normalization'])[in_indicies]
-                sub_names = np.hstack(self.win.trees.subtractive_parameters['Names'])[in_indicies]
-
-                avg_norm = np.average(sub_norms)
-
-            self.win.FileProgressBar.setValue(0)
-            self.win.FileProgressBar.setMaximum(len(in_indicies[0]))
-
-            pool = Pool(cpu_count())
-            for count, results in enumerate(pool.imap_unordered(partial(self.compile_image, sub_names, sub_norms, avg_norm, self.win.SubRotationalSlider), range(len(in_indicies[0])))):
-
-                if count == 0:
-
-                    total_img = results[1]
-
-                else:
-
-                    total_img += results[1]
-
-                self.win.FileProgressBar.setValue(count + 1)
-
-            pool.close()
-            pool.join()
-
-            self.win.FileProgressBar.setValue(0)
+            trace_job = partial(self.compile_traces, sub_names, sub_norms, self.win.SubRotationalSlider.value(), line_y, line_x)
 
         elif self.win.selection.selection_parameters['Type'] == 'Total Images':
 
             mul_img = self.win.files.load_correction()
 
-            compile_norms, add_names, sub_names = np.ones((1)), np.ones((1)), np.ones((1))
-
-            if self.win.AddImageNameTree.topLevelItemCount() != 0:
-
-                in_indicies = np.where(np.hstack(self.win.trees.additive_parameters['Accepted']) == True)
-
-                add_norms = np.hstack(self.win.trees.additive_parameters['Normalization'])[in_indicies]
-                add_names = np.hstack(self.win.trees.additive_parameters['Names'])[in_indicies]
-
-                compile_norms = add_norms + compile_norms
-
-                avg_compile_norm = np.average(compile_norms)
-
-            if self.win.SubImageNameTree.topLevelItemCount() != 0:
-
-                in_indicies = np.where(np.hstack(self.win.trees.subtractive_parameters['Accepted']) == True)
-
-                sub_norms = np.hstack(self.win.trees.subtractive_parameters['Normalization'])[in_indicies]
-                sub_names = np.hstack(self.win.trees.subtractive_parameters['Names'])[in_indicies]
-
-                compile_norms = -sub_norms + compile_norms
-
-                avg_compile_norm = np.average(compile_norms)
+            add_names, sub_names, compile_norms, compile_cycles = self.win.files.compile_parameters()
 
-            self.win.FileProgressBar.setValue(0)
-            self.win.FileProgressBar.setMaximum(len(in_indicies[0]))
+            trace_job = partial(self.compile_total_traces, add_names, sub_names, self.win.AddRotationalSlider.value(), self.win.SubRotationalSlider.value(), \
+                                compile_norms, mul_img, line_y, line_x)
 
-            pool = Pool(cpu_count())
-            for count, results in enumerate(pool.imap_unordered(partial(self.win.files.compile_image, add_names, sub_names, compile_norms, avg_compile_norm), range(len(in_indicies[0])))):
+        if self.win.jobs.start('Compiling Traces', trace_job, self.compiled_trace, reads = self.trace_reads(), writes = ('Trace Plot',)) is None:
 
-                if count == 0:
-
-                    total_img = results[1]
+            self.win.compileButton.setChecked(False)
 
-                else:
+    #Background job of compile_plot, returns the trace of the compile
+    #of the accepted additive or subtractive images (see src.Engine).
+    #=============================================================
+    def compile_traces(self, names, norms, rotation, line_y, line_x, job):
 
-                    total_img += results[1]
+        return compile_traces(names, norms, rotation, line_y, line_x, self.win.workers.imap_unordered, job.report)
 
-                self.win.FileProgressBar.setValue(count + 1)
+    #Background job of compile_plot, returns the trace of the compile
+    #of the accepted total images (see src.Engine).
+    #=============================================================
+    def compile_total_traces(self, add_names, sub_names, add_rotation, sub_rotation, compile_norms, mul_img, line_y, line_x, job):
 
-            pool.close()
-            pool.join()
+        return compile_total_traces(add_names, sub_names, add_rotation, sub_rotation, compile_norms, mul_img, line_y, line_x, \
+                                    self.win.workers.imap_unordered, job.report, self.win.workers.cpu_imap)
 
-            self.win.FileProgressBar.setValue(0)
+    #Plots the compiled trace on the TracePlot.
+    #=============================================================
+    def compiled_trace(self, trace):
 
-            total_img /= mul_img
-        
-        self.win.traceView.axes.plot(total_img[self.win.line_y, self.win.line_x])
-        self.win.traceView.axes.set(xticks = [], xticklabels = [], yticks = [], yticklabels = [])
-        self.win.traceView.axes.set_ylim([self.win.traceView.axes.get_ylim()[0] - self.win.traceView.axes.get_ylim()[1] * 0.025, self.win.traceView.axes.get_ylim()[1] * 1.05])
-        self.win.traceView.axes.set_ylabel('Intensity', fontsize = 8)
-        self.win.traceView.axes.set_xlabel('Number of Selected Points', fontsize = 8)
-        self.win.traceView.axes.xaxis.label.set_color((0.89, 0.89, 0.89, 1.0))
-        self.win.traceView.axes.yaxis.label.set_color((0.89, 0.89, 0.89, 1.0))
-        self.win.traceView.draw()
\ No newline at end of file
+        self.win.traceView.axes.plot(trace)
+        self.format_traceplot()
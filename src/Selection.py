@@ -68,7 +68,7 @@ class Selection:
         
             self.selection_parameters['Cycle_Index'] = tree.currentIndex().parent().row()
             self.selection_parameters['Item_Index'] = tree.currentIndex().row()
-            self.selection_parameters['Total_Index'] = tree.topLevelItem(0).childCount() * tree.currentIndex().parent().row() + tree.currentIndex().row()
+            self.selection_parameters['Total_Index'] = self.win.trees.loaded_set().index(tree.currentIndex().parent().row(), tree.currentIndex().row())
 
         self.selection_parameters['Type'] = tree.currentIndex().model().headerData(0, Qt.Horizontal, 0)
 
@@ -103,70 +103,66 @@ class Selection:
         
         if self.selection_parameters['Type'] == 'Additive Images':
 
-            self.selection_parameters['Image'] = np.rot90(self.win.files.load_image(\
-                                                          self.win.trees.additive_parameters['Names'][self.selection_parameters['Cycle_Index']][self.selection_parameters['Item_Index']]), \
-                                                         -self.win.AddRotationalSlider.value())
+            self.selection_parameters['Image'] = self.win.files.load_image(\
+                                                          self.win.trees.additive_parameters.names[self.selection_parameters['Total_Index']], \
+                                                          self.win.AddRotationalSlider.value()).astype(float)
             
         elif self.selection_parameters['Type'] == 'Subtractive Images':
             
-            self.selection_parameters['Image'] = np.rot90(self.win.files.load_image(\
-                                                          self.win.trees.subtractive_parameters['Names'][self.selection_parameters['Cycle_Index']][self.selection_parameters['Item_Index']]), \
-                                                         -self.win.SubRotationalSlider.value())
+            self.selection_parameters['Image'] = self.win.files.load_image(\
+                                                          self.win.trees.subtractive_parameters.names[self.selection_parameters['Total_Index']], \
+                                                          self.win.SubRotationalSlider.value()).astype(float)
         
         elif self.selection_parameters['Type'] == 'Total Images':
 
             additive_image, subtractive_image = np.array([[0]]), np.array([[0]])
 
-            if self.win.AddImageNameTree.topLevelItemCount() != 0:
+            if self.win.AddImageNameTree.model().rowCount() != 0:
                 
-                additive_image = np.rot90(self.win.files.load_image(\
-                                          self.win.trees.additive_parameters['Names'][self.selection_parameters['Cycle_Index']][self.selection_parameters['Item_Index']]), \
-                                         -self.win.AddRotationalSlider.value())
+                additive_image = self.win.files.load_image(\
+                                          self.win.trees.additive_parameters.names[self.selection_parameters['Total_Index']], \
+                                          self.win.AddRotationalSlider.value())
                 
-            if self.win.SubImageNameTree.topLevelItemCount() != 0:
+            if self.win.SubImageNameTree.model().rowCount() != 0:
             
-                subtractive_image = np.rot90(self.win.files.load_image(\
-                                             self.win.trees.subtractive_parameters['Names'][self.selection_parameters['Cycle_Index']][self.selection_parameters['Item_Index']]), \
-                                            -self.win.SubRotationalSlider.value())
+                subtractive_image = self.win.files.load_image(\
+                                             self.win.trees.subtractive_parameters.names[self.selection_parameters['Total_Index']], \
+                                             self.win.SubRotationalSlider.value())
                 
-            self.selection_parameters['Image'] = additive_image - subtractive_image
+            self.selection_parameters['Image'] = np.subtract(additive_image, subtractive_image, dtype = float)
 
             if self.win.MulCorrNameTree.topLevelItemCount() != 0:
                 
-                self.selection_parameters['Image'] /= np.rot90(self.win.files.load_image(self.win.trees.multiplicative_parameters['Name']), -self.win.MulCorrRotationalSlider.value())
+                self.selection_parameters['Image'] /= self.win.files.load_image(self.win.trees.multiplicative_parameters['Name'], self.win.MulCorrRotationalSlider.value())
 
         elif self.selection_parameters['Type'] == 'Multiplicative Correction':
 
-            self.selection_parameters['Image'] = np.rot90(self.win.files.load_image(\
-                                                          self.win.trees.multiplicative_parameters['Name']), \
-                                                         -self.win.MulCorrRotationalSlider.value())
+            self.selection_parameters['Image'] = self.win.files.load_image(\
+                                                          self.win.trees.multiplicative_parameters['Name'], \
+                                                          self.win.MulCorrRotationalSlider.value()).astype(float)
 
-        self.win.image.clear_image()
+        self.win.image.reset_color_bounds()
         self.win.image.update_image(self.selection_parameters['Image'])
 
-        if self.win.AddImageNameTree.topLevelItemCount() != 0:
+        if self.win.AddImageNameTree.model().rowCount() != 0:
 
-            self.win.plot.clear_plot(self.win.AddPlotView)
-            self.win.plot.update_plot(self.win.AddPlotView, self.win.trees.additive_parameters['Normalization'], self.win.trees.additive_parameters['Accepted'], self.win.addStdMinBox, self.win.addStdMaxBox)
+            self.win.plot.update_selected(self.win.AddPlotView)
 
-        if self.win.SubImageNameTree.topLevelItemCount() != 0:
+        if self.win.SubImageNameTree.model().rowCount() != 0:
 
-            self.win.plot.clear_plot(self.win.SubPlotView)
-            self.win.plot.update_plot(self.win.SubPlotView, self.win.trees.subtractive_parameters['Normalization'], self.win.trees.subtractive_parameters['Accepted'], self.win.subStdMinBox, self.win.subStdMaxBox)
+            self.win.plot.update_selected(self.win.SubPlotView)
 
     def selected_cycle(self):
 
         self.win.image.clear_image()
 
-        if self.win.AddImageNameTree.topLevelItemCount() != 0:
+        if self.win.AddImageNameTree.model().rowCount() != 0:
 
-            self.win.plot.clear_plot(self.win.AddPlotView)
-            self.win.plot.update_plot(self.win.AddPlotView, self.win.trees.additive_parameters['Normalization'], self.win.trees.additive_parameters['Accepted'], self.win.addStdMinBox, self.win.addStdMaxBox)
+            self.win.plot.update_selected(self.win.AddPlotView)
 
-        if self.win.SubImageNameTree.topLevelItemCount() != 0:
+        if self.win.SubImageNameTree.model().rowCount() != 0:
 
-            self.win.plot.clear_plot(self.win.SubPlotView)
-            self.win.plot.update_plot(self.win.SubPlotView, self.win.trees.subtractive_parameters['Normalization'], self.win.trees.subtractive_parameters['Accepted'], self.win.subStdMinBox, self.win.subStdMaxBox)
+            self.win.plot.update_selected(self.win.SubPlotView)
 
     def swap_selected(self):
         
@@ -176,7 +172,7 @@ class Selection:
 
             if self.selection_parameters['Item_Index'] != None:
                 
-                self.win.SubImageNameTree.topLevelItem(self.selection_parameters['Cycle_Index']).child(self.selection_parameters['Item_Index']).setSelected(True)
+                self.win.trees.select_item(self.win.SubImageNameTree, self.selection_parameters['Cycle_Index'], self.selection_parameters['Item_Index'])
 
         elif self.selection_parameters['Type'] == 'Subtractive Images':
 
@@ -184,13 +180,13 @@ class Selection:
 
             if self.selection_parameters['Item_Index'] != None:
                 
-                self.win.AddImageNameTree.topLevelItem(self.selection_parameters['Cycle_Index']).child(self.selection_parameters['Item_Index']).setSelected(True)
+                self.win.trees.select_item(self.win.AddImageNameTree, self.selection_parameters['Cycle_Index'], self.selection_parameters['Item_Index'])
 
         elif self.selection_parameters['Type'] == 'Total Images':
 
             if self.selection_parameters['Item_Index'] != None:
 
-                self.win.TotalImageNameTree.topLevelItem(self.selection_parameters['Cycle_Index']).child(self.selection_parameters['Item_Index']).setSelected(True)
+                self.win.trees.select_item(self.win.TotalImageNameTree, self.selection_parameters['Cycle_Index'], self.selection_parameters['Item_Index'])
 
     def reselect_selected(self):
 
@@ -198,19 +194,19 @@ class Selection:
 
             if self.selection_parameters['Item_Index'] != None:
                 
-                self.win.AddImageNameTree.topLevelItem(self.selection_parameters['Cycle_Index']).child(self.selection_parameters['Item_Index']).setSelected(True)
+                self.win.trees.select_item(self.win.AddImageNameTree, self.selection_parameters['Cycle_Index'], self.selection_parameters['Item_Index'])
 
         elif self.selection_parameters['Type'] == 'Subtractive Images':
 
             if self.selection_parameters['Item_Index'] != None:
                 
-                self.win.SubImageNameTree.topLevelItem(self.selection_parameters['Cycle_Index']).child(self.selection_parameters['Item_Index']).setSelected(True)
+                self.win.trees.select_item(self.win.SubImageNameTree, self.selection_parameters['Cycle_Index'], self.selection_parameters['Item_Index'])
 
         elif self.selection_parameters['Type'] == 'Total Images':
 
             if self.selection_parameters['Item_Index'] != None:
 
-                self.win.TotalImageNameTree.topLevelItem(self.selection_parameters['Cycle_Index']).child(self.selection_parameters['Item_Index']).setSelected(True)
+                self.win.trees.select_item(self.win.TotalImageNameTree, self.selection_parameters['Cycle_Index'], self.selection_parameters['Item_Index'])
 
 
     #Clears selection in all QTreeWidgets except for selected 
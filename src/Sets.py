@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Sets
+
+This script holds the data model of an additive or subtractive
+image set. The image paths, normalization factors, acceptance mask
+and statistics records are stored as contiguous numpy columns over
+the whole set, and the cycles are described by an array of offsets
+into those columns. A cycle is a zero-copy view of the columns and
+changing the number of cycles only recalculates the offsets. The
+acceptance masks of the start/stop and standard deviation bounds
+are calculated over these columns.
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import numpy as np
+
+from src.Statistics import empty_statistics
+
+def split_offsets(length, cycles):
+    '''
+    Returns the offsets of "cycles" consecutive cycles over "length"
+    images, with the same cycle lengths as numpy.array_split, the first
+    length % cycles cycles hold one extra image.
+    '''
+
+    cycles = max(1, int(cycles))
+    size, extra = divmod(length, cycles)
+
+    lengths = np.full(cycles, size, dtype = np.int64)
+    lengths[:extra] += 1
+
+    return np.concatenate(([0], np.cumsum(lengths)))
+
+def std_mask(norm_data, std_min, std_max):
+    '''
+    Returns the acceptance mask of a flat array of normalization data,
+    the average and standard deviation of the data are calculated once
+    and every image is tested with a single vectorized comparison.
+    '''
+
+    norm_data = np.asarray(norm_data, dtype = np.float64)
+
+    if np.size(norm_data) == 0:
+
+        return np.ones(0, dtype = bool)
+
+    norm_avg, norm_std = np.average(norm_data), np.std(norm_data)
+
+    return ~((norm_data < norm_avg - norm_std * std_min) | (norm_data > norm_avg + norm_std * std_max))
+
+def start_stop_mask(offsets, drop_first, drop_last):
+    '''
+    Returns the acceptance mask of the images that are not within the
+    first "drop_first" or last "drop_last" images of their cycle, the
+    cycles are given by their offsets into the flat array of images.
+    '''
+
+    offsets = np.asarray(offsets)
+    lengths = np.diff(offsets)
+
+    cycle = np.repeat(np.arange(len(lengths)), lengths)
+    position = np.arange(offsets[-1] - offsets[0]) - (offsets[:-1] - offsets[0])[cycle]
+
+    return (position >= drop_first) & (position < lengths[cycle] - drop_last)
+
+class ImageSet:
+    '''
+    Columnar storage of an image set, each column holds one value per
+    image of the set in the order the images were loaded.
+    '''
+
+    def __init__(self, names = (), cycles = 1):
+        '''
+        Creates the columns for the given image paths, every image is
+        accepted and its statistics are left empty until calculated.
+        '''
+
+        self.load(names, cycles)
+
+    def load(self, names, cycles = 1):
+        '''
+        Replaces the images of the set with the given image paths.
+        '''
+
+        self.names = np.asarray(names, dtype = str)
+        self.normalization = np.zeros(len(self.names))
+        self.accepted = np.ones(len(self.names), dtype = bool)
+        self.statistics = empty_statistics(len(self.names))
+
+        self.set_cycles(cycles)
+
+    def clear(self):
+        '''
+        Removes all images from the set.
+        '''
+
+        self.load([], len(self.offsets) - 1)
+
+    def __len__(self):
+
+        return len(self.names)
+
+    def set_cycles(self, cycles):
+        '''
+        Divides the images into the given number of cycles. Only the
+        cycle offsets are recalculated, the columns are left in place.
+        '''
+
+        self.offsets = split_offsets(len(self.names), cycles)
+
+    @property
+    def cycles(self):
+        '''
+        Number of cycles the images are divided into.
+        '''
+
+        return len(self.offsets) - 1
+
+    def cycle(self, column, cycle):
+        '''
+        Returns a view of a column over the images of a cycle.
+        '''
+
+        return column[self.offsets[cycle] : self.offsets[cycle + 1]]
+
+    def index(self, cycle, item):
+        '''
+        Returns the position in the columns of an item of a cycle.
+        '''
+
+        return int(self.offsets[cycle] + item)
+
+    def cycle_index(self):
+        '''
+        Returns the cycle each image belongs to.
+        '''
+
+        return np.repeat(np.arange(self.cycles), np.diff(self.offsets))
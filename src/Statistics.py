@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Statistics
+
+This script calculates the statistics record of an image when an
+image set is loaded. The trimmed sum used for normalization along
+with the mean, standard deviation, extrema, saturated and NaN pixel
+counts, shape and dtype of each image are harvested in a single
+pass, so bounds, quality plots and validation can later be run over
+the statistics table without reading the images again.
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import numpy as np
+
+#Record stored for every image of an image set
+STATISTICS_DTYPE = np.dtype([('Sum', np.float64),
+                             ('Mean', np.float64),
+                             ('Std', np.float64),
+                             ('Min', np.float64),
+                             ('Max', np.float64),
+                             ('Saturated', np.int64),
+                             ('NaN', np.int64),
+                             ('Rows', np.int64),
+                             ('Columns', np.int64),
+                             ('Dtype', 'U10')])
+
+#Fraction of the image trimmed from each border for the normalization sum
+TRIM = 0.01
+
+#Size of the blocks of rows the image is read in
+BLOCK_BYTES = 1 << 20
+
+def empty_statistics(length):
+    '''
+    Returns a statistics table for the given number of images, with
+    the numerical fields set to NaN.
+    '''
+
+    statistics = np.zeros(length, dtype = STATISTICS_DTYPE)
+
+    for field in ('Sum', 'Mean', 'Std', 'Min', 'Max'):
+
+        statistics[field] = np.nan
+
+    return statistics
+
+def frame_statistics(img):
+    '''
+    Calculates the statistics record of an image. The image is read once,
+    in blocks of rows converted to float64, and the per-block mean and
+    variance are merged (Chan et al.) so no full-size copy is made. The
+    trimmed sum matches the normalization of the original images, NaN
+    pixels propagate into it, while the mean, deviation and extrema
+    ignore NaN pixels.
+    '''
+
+    record = np.zeros((), dtype = STATISTICS_DTYPE)
+
+    record['Rows'], record['Columns'] = np.shape(img)[0], int(np.prod(np.shape(img)[1:]))
+    record['Dtype'] = img.dtype.name
+
+    rows, columns = int(record['Rows']), int(record['Columns'])
+    img = np.reshape(img, (rows, columns))
+
+    row_trim, column_trim = int(rows * TRIM), int(columns * TRIM)
+
+    saturation = np.iinfo(img.dtype).max if np.issubdtype(img.dtype, np.integer) else None
+
+    count, mean, m2 = 0, 0.0, 0.0
+    total, minimum, maximum, saturated, nans = 0.0, np.inf, -np.inf, 0, 0
+
+    block_rows = max(1, BLOCK_BYTES // max(1, columns * 8))
+
+    for start in range(0, rows, block_rows):
+
+        stop = min(start + block_rows, rows)
+        block = np.asarray(img[start:stop], dtype = np.float64)
+
+        trim_start, trim_stop = max(start, row_trim), min(stop, rows - row_trim)
+
+        if trim_start < trim_stop:
+
+            total += np.sum(block[trim_start - start : trim_stop - start, column_trim : columns - column_trim])
+
+        if saturation is not None:
+
+            saturated += np.count_nonzero(img[start:stop] == saturation)
+
+        else:
+
+            nan_mask = np.isnan(block)
+
+            if nan_mask.any():
+
+                nans += np.count_nonzero(nan_mask)
+                block = block[~nan_mask]
+
+        if np.size(block) != 0:
+
+            block_count = np.size(block)
+            block_mean = np.mean(block)
+            block_m2 = np.sum(np.square(block - block_mean))
+
+            delta = block_mean - mean
+            mean += delta * block_count / (count + block_count)
+            m2 += block_m2 + delta ** 2 * count * block_count / (count + block_count)
+            count += block_count
+
+            minimum, maximum = min(minimum, np.min(block)), max(maximum, np.max(block))
+
+    record['Sum'] = total
+    record['Mean'] = mean if count != 0 else np.nan
+    record['Std'] = np.sqrt(m2 / count) if count != 0 else np.nan
+    record['Min'] = minimum if count != 0 else np.nan
+    record['Max'] = maximum if count != 0 else np.nan
+    record['Saturated'] = saturated
+    record['NaN'] = nans
+
+    return record
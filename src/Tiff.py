@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Tiff
+
+This script reads uncompressed .tiff images, as written by the
+area detectors, directly from disk. The image file directory (IFD)
+is parsed once per file and the pixel data is returned as a
+read-only numpy.memmap, so no decoded copy of the image is made.
+Images that cannot be memory-mapped (compressed, tiled, multi-page
+or multi-sample images) are left to skimage.io.imread.
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import os
+import struct
+import threading
+import numpy as np
+
+from collections import OrderedDict
+
+#TIFF tags required to locate the pixel data
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+STRIP_OFFSETS = 273
+SAMPLES_PER_PIXEL = 277
+STRIP_BYTE_COUNTS = 279
+PLANAR_CONFIGURATION = 284
+TILE_WIDTH = 322
+SAMPLE_FORMAT = 339
+
+#Struct formats and sizes of the TIFF field types that hold integers
+FIELD_TYPES = {1: ('B', 1), 3: ('H', 2), 4: ('I', 4), 6: ('b', 1), 8: ('h', 2), 9: ('i', 4)}
+
+#numpy kinds of the TIFF sample formats (unsigned, signed, float)
+SAMPLE_KINDS = {1: 'u', 2: 'i', 3: 'f'}
+
+#Number of files whose layout is kept
+CACHED_LAYOUTS = 4096
+
+layouts = OrderedDict()
+layouts_lock = threading.Lock()
+
+def read_ifd(fh, byte_order):
+    '''
+    Reads the first image file directory of a classic TIFF and returns
+    its integer tags as a dictionary of tuples, along with the offset
+    of the next directory.
+    '''
+
+    fh.seek(4)
+    offset, = struct.unpack(byte_order + 'I', fh.read(4))
+
+    fh.seek(offset)
+    count, = struct.unpack(byte_order + 'H', fh.read(2))
+    entries = fh.read(12 * count)
+    next_offset, = struct.unpack(byte_order + 'I', fh.read(4))
+
+    tags = {}
+    for i in range(count):
+
+        tag, field_type, n_values = struct.unpack(byte_order + 'HHI', entries[12 * i : 12 * i + 8])
+
+        if field_type not in FIELD_TYPES:
+
+            continue
+
+        fmt, size = FIELD_TYPES[field_type]
+
+        if n_values * size <= 4:
+
+            data = entries[12 * i + 8 : 12 * i + 8 + n_values * size]
+
+        else:
+
+            value_offset, = struct.unpack(byte_order + 'I', entries[12 * i + 8 : 12 * i + 12])
+            fh.seek(value_offset)
+            data = fh.read(n_values * size)
+
+        tags[tag] = struct.unpack(byte_order + fmt * n_values, data)
+
+    return tags, next_offset
+
+def parse_layout(path):
+    '''
+    Determines the offset, dtype and shape of the pixel data of a .tiff
+    image. Returns None if the image cannot be memory-mapped.
+    '''
+
+    with open(path, 'rb') as fh:
+
+        header = fh.read(4)
+
+        if header[:2] == b'II':
+
+            byte_order = '<'
+
+        elif header[:2] == b'MM':
+
+            byte_order = '>'
+
+        else:
+
+            return None
+
+        if struct.unpack(byte_order + 'H', header[2:4])[0] != 42:
+
+            return None
+
+        tags, next_offset = read_ifd(fh, byte_order)
+
+    if next_offset != 0 or TILE_WIDTH in tags or STRIP_OFFSETS not in tags or STRIP_BYTE_COUNTS not in tags:
+
+        return None
+
+    if tags.get(COMPRESSION, (1,))[0] != 1 or tags.get(SAMPLES_PER_PIXEL, (1,))[0] != 1 or tags.get(PLANAR_CONFIGURATION, (1,))[0] != 1:
+
+        return None
+
+    bits = tags.get(BITS_PER_SAMPLE, (1,))[0]
+    kind = SAMPLE_KINDS.get(tags.get(SAMPLE_FORMAT, (1,))[0])
+
+    if bits not in (8, 16, 32, 64) or kind is None or (kind == 'f' and bits == 8):
+
+        return None
+
+    dtype = np.dtype(byte_order + kind + str(bits // 8))
+    shape = (tags[IMAGE_LENGTH][0], tags[IMAGE_WIDTH][0])
+
+    offsets, byte_counts = tags[STRIP_OFFSETS], tags[STRIP_BYTE_COUNTS]
+
+    for i in range(len(offsets) - 1):
+
+        if offsets[i] + byte_counts[i] != offsets[i + 1]:
+
+            return None
+
+    if sum(byte_counts) < shape[0] * shape[1] * dtype.itemsize:
+
+        return None
+
+    return offsets[0], dtype, shape
+
+def memmap_tiff(path):
+    '''
+    Returns a read-only numpy.memmap of the pixel data of an uncompressed
+    .tiff image, or None if the image must be decoded. The layout of the
+    most recently read files is parsed once and reused until the file is
+    modified.
+    '''
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+    with layouts_lock:
+
+        layout = layouts.get(key, False)
+
+        if layout is not False:
+
+            layouts.move_to_end(key)
+
+    if layout is False:
+
+        try:
+
+            layout = parse_layout(path)
+
+        except (OSError, struct.error, KeyError, IndexError):
+
+            layout = None
+
+        with layouts_lock:
+
+            layouts[key] = layout
+
+            while len(layouts) > CACHED_LAYOUTS:
+
+                layouts.popitem(last = False)
+
+    if layout is None:
+
+        return None
+
+    offset, dtype, shape = layout
+
+    #A truncated file cannot be mapped, it is left to be decoded
+    try:
+
+        return np.memmap(path, dtype = dtype, mode = 'r', offset = offset, shape = shape)
+
+    except (ValueError, OSError):
+
+        return None
@@ -13,13 +13,19 @@ Author: Nick Burns, January, 20th, 2024
 '''
 
 import os
-import numpy as np
 
 from PySide6.QtWidgets import QTreeWidgetItem
-from PySide6.QtGui import QBrush, QColor
+from PySide6.QtCore import QItemSelectionModel, QTimer
 
 from functools import partial
-from multiprocessing.pool import ThreadPool as Pool
+
+from src.Engine import set_statistics, normalize_set
+from src.Sets import ImageSet
+from src.Models import ImageSetModel
+
+#Idle interval after the last edit of the cycle and drop controls
+#before the bounds are recalculated
+CONTROL_DELAY_MS = 150
 
 class Trees:
     '''
@@ -39,16 +45,37 @@ class Trees:
         #                  Data
         #=========================================
         
-        self.additive_parameters = {'Names': [],
-                                    'Accepted': [],
-                                    'Normalization': []}
+        self.additive_parameters = ImageSet()
         
-        self.subtractive_parameters = {'Names': [],
-                                       'Accepted': [],
-                                       'Normalization': []}
+        self.subtractive_parameters = ImageSet()
         
         self.multiplicative_parameters = {'Name': None}
 
+        self.loading_sets = {}
+
+        #=========================================
+        #                 Models
+        #=========================================
+
+        self.win.AddImageNameTree.setModel(ImageSetModel('Additive Images', parent = self.win))
+        self.win.SubImageNameTree.setModel(ImageSetModel('Subtractive Images', parent = self.win))
+        self.win.TotalImageNameTree.setModel(ImageSetModel('Total Images', True, parent = self.win))
+
+        for tree in (self.win.AddImageNameTree, self.win.SubImageNameTree, self.win.TotalImageNameTree):
+
+            tree.setUniformRowHeights(True)
+
+        #=========================================
+        #                Scheduler
+        #=========================================
+
+        self.pending_cycles = False
+
+        self.control_timer = QTimer(self.win)
+        self.control_timer.setSingleShot(True)
+        self.control_timer.setInterval(CONTROL_DELAY_MS)
+        self.control_timer.timeout.connect(self.run_update)
+
         #=========================================
         #             Event Handeling
         #=========================================
@@ -71,13 +98,13 @@ class Trees:
         self.win.SubSwapSetButton.clicked.connect(self.swap_set)
 
         #<<<<<<<<<<<<<<Spinboxs<<<<<<<<<<<<<<<
-        self.win.CyclesBox.valueChanged.connect(self.update_cycles)
-        self.win.DropFirstBox.valueChanged.connect(self.win.bounds.change_bounds)
-        self.win.DropLastBox.valueChanged.connect(self.win.bounds.change_bounds)
+        self.win.CyclesBox.valueChanged.connect(lambda: self.schedule_update(True))
+        self.win.DropFirstBox.valueChanged.connect(lambda: self.schedule_update(False))
+        self.win.DropLastBox.valueChanged.connect(lambda: self.schedule_update(False))
 
         #<<<<<<<<<<<<<<Actions<<<<<<<<<<<<<<<
-        self.win.actionAddAdditiveImages.triggered.connect(lambda: self.add_set(self.win.AddImageNameTree, self.win.AddPlotView, self.win.AddAddSetButton, self.win.AddRemoveSetButton, self.additive_parameters, self.win.addStdMinBox, self.win.addStdMaxBox))
-        self.win.actionAddSubtractiveImages.triggered.connect(lambda: self.add_set(self.win.SubImageNameTree, self.win.SubPlotView, self.win.SubAddSetButton, self.win.SubRemoveSetButton, self.subtractive_parameters, self.win.subStdMinBox, self.win.subStdMaxBox))
+        self.win.actionAddAdditiveImages.triggered.connect(lambda: self.add_set_logic(self.win.AddImageNameTree, self.win.AddPlotView, self.win.AddAddSetButton, self.win.AddRemoveSetButton, self.additive_parameters, self.win.addStdMinBox, self.win.addStdMaxBox))
+        self.win.actionAddSubtractiveImages.triggered.connect(lambda: self.add_set_logic(self.win.SubImageNameTree, self.win.SubPlotView, self.win.SubAddSetButton, self.win.SubRemoveSetButton, self.subtractive_parameters, self.win.subStdMinBox, self.win.subStdMaxBox))
         self.win.actionAddMultiplicativeCorrection.triggered.connect(self.add_corr)
 
         self.win.actionRemoveAdditiveImages.triggered.connect(lambda: self.remove_set(self.win.AddImageNameTree, self.win.AddPlotView, self.win.AddAddSetButton, self.win.AddRemoveSetButton, self.additive_parameters))
@@ -91,34 +118,30 @@ class Trees:
         procceed. In either case the buttons are set to their appropriate states.
         '''
         
-        if tree.topLevelItemCount() == 0:
-            
-            remove_button.setChecked(False)
+        if self.win.jobs.available(writes = (tree.model().title,)) == False:
 
-            image_parameters['Names'] = self.win.files.browse_files()
+            add_button.setChecked(False)
 
-            if len(image_parameters['Names']) != 0:
+        elif tree.model().rowCount() == 0:
+            
+            remove_button.setChecked(False)
 
-                if len(self.additive_parameters['Names']) != 0 and len(self.subtractive_parameters['Names']) != 0:
+            names = self.win.files.browse_files()
 
-                    if len(np.hstack(self.additive_parameters['Names'])) != len(np.hstack(self.subtractive_parameters['Names'])):
+            if len(names) != 0:
 
-                        self.win.messaging.error_message('Incorrect Number of Imports', 'The number of imports must be the same for both additive and subtractive images!')
-                        
-                        image_parameters['Names'] = []
-                        image_parameters['Accepted'] = []
-                        image_parameters['Normalization'] = []
+                lengths = [len(image_set) for image_set in [self.additive_parameters, self.subtractive_parameters] + list(self.loading_sets.values()) if len(image_set) != 0]
 
-                        add_button.setChecked(False)
-                        remove_button.setChecked(True)
+                if len(lengths) != 0 and len(names) not in lengths:
 
-                    else:
+                    self.win.messaging.error_message('Incorrect Number of Imports', 'The number of imports must be the same for both additive and subtractive images!')
 
-                        self.add_set(tree, plot, image_parameters, min_box, max_box)
+                    add_button.setChecked(False)
+                    remove_button.setChecked(True)
 
                 else:
 
-                    self.add_set(tree, plot, image_parameters, min_box, max_box)
+                    self.add_set(tree, add_button, remove_button, image_parameters, names)
 
             else:
 
@@ -129,53 +152,64 @@ class Trees:
 
             add_button.setChecked(True)
 
-    def add_set(self, tree, plot, image_parameters, min_box, max_box):
+    def add_set(self, tree, add_button, remove_button, image_parameters, names):
         '''
         Adds a list of image names to the additive or subtractive and total 
-        image trees. The sum of intenisty for each image is calculated and 
-        then plotted.
+        image trees. The statistics of the images are calculated in a
+        background job into a separate image set, once they are ready the
+        images are moved to the shown set and added to the trees.
         '''
 
-        self.win.FileProgressBar.setValue(0)
-        self.win.FileProgressBar.setMaximum(len(image_parameters['Names']))
+        loading_set = ImageSet(names, int(self.win.CyclesBox.text()))
 
-        image_parameters['Accepted'] = np.array_split(np.array([True for _ in range(len(image_parameters['Names']))]), int(self.win.CyclesBox.text()), axis = 0)
-        image_parameters['Names'] = np.array_split(image_parameters['Names'], int(self.win.CyclesBox.text()), axis = 0)
+        if self.win.jobs.start('Loading ' + tree.model().title, partial(self.set_statistics, loading_set.names), \
+                               partial(self.set_loaded, tree, image_parameters, loading_set), writes = (tree.model().title,), \
+                               done_callback = partial(self.load_finished, tree, add_button, remove_button, loading_set)) is not None:
 
-        if len(image_parameters['Names']) > 0:
+            self.loading_sets[tree.model().title] = loading_set
 
-            image_parameters['Normalization'] = np.zeros(len(np.hstack(image_parameters['Names'])))
+        else:
 
-            pool = Pool(os.cpu_count())
-                                
-            for count, results in enumerate(pool.imap_unordered(partial(self.normalization_factors, np.hstack(image_parameters['Names'])), range(len(np.hstack(image_parameters['Names']))))):
-                
-                image_parameters['Normalization'][results[0]] = results[1]
-                self.win.FileProgressBar.setValue(count + 1)
+            add_button.setChecked(False)
+            remove_button.setChecked(True)
 
-            pool.close()
-            pool.join()
+    def set_statistics(self, names, job):
+        '''
+        Background job of add_set, returns the statistics table of the
+        given images (see src.Engine).
+        '''
 
-            self.win.FileProgressBar.setValue(0)
+        return set_statistics(names, self.win.workers.imap_unordered, job.report, self.win.workers.cpu_imap)
 
-            image_parameters['Normalization'] = np.array_split(np.array(image_parameters['Normalization']), int(self.win.CyclesBox.text()), axis = 0)
+    def set_loaded(self, tree, image_parameters, loading_set, statistics):
+        '''
+        Moves the loaded images to the shown image set once their
+        statistics are calculated, unless the load was removed while the
+        statistics were calculated, then bounds and shows every set.
+        '''
 
-            image_parameters['Accepted'] = self.win.bounds.start_stop_bounds(image_parameters['Accepted'])
-            image_parameters['Accepted'] = self.win.bounds.cycle_std_bounds(image_parameters['Normalization'], image_parameters['Accepted'], min_box, max_box)
-            self.win.bounds.merge_bounds()
-            
-            self.populate_tree(self.win.TotalImageNameTree, np.array_split(np.array(['Image_' + str(i) for i in range(len(np.hstack(image_parameters['Names'])))]), int(self.win.CyclesBox.text())), image_parameters['Accepted'])
-            self.populate_tree(tree, image_parameters['Names'], image_parameters['Accepted'])
-            
-            self.win.plot.update_plot(plot, image_parameters['Normalization'], image_parameters['Accepted'], min_box, max_box)
-            
-        else:
-            
-            self.win.add_button.setChecked(False)
+        if self.loading_sets.get(tree.model().title) is loading_set:
 
-            image_parameters['Names'] = []
-            image_parameters['Accepted'] = []
-            image_parameters['Normalization'] = []
+            del self.loading_sets[tree.model().title]
+
+            image_parameters.load(loading_set.names, int(self.win.CyclesBox.text()))
+            normalize_set(image_parameters, statistics)
+
+            self.win.bounds.change_bounds()
+
+    def load_finished(self, tree, add_button, remove_button, loading_set):
+        '''
+        Forgets a load whose job failed or was canceled before its images
+        were moved to the shown set, and resets the add and remove buttons
+        so the images can be added again.
+        '''
+
+        if self.loading_sets.get(tree.model().title) is loading_set:
+
+            del self.loading_sets[tree.model().title]
+
+            add_button.setChecked(False)
+            remove_button.setChecked(True)
 
     def add_corr(self):
         '''
@@ -211,15 +245,20 @@ class Trees:
         '''
 
         remove_button.setChecked(True)
+
+        if self.loading_sets.pop(tree.model().title, None) is not None:
+
+            self.win.jobs.cancel(tree.model().title)
+            add_button.setChecked(False)
         
-        if tree.topLevelItemCount() != 0:
+        elif tree.model().rowCount() != 0:
 
-            tree.clear()
+            tree.model().clear()
             add_button.setChecked(False)
 
-            if self.win.AddImageNameTree.topLevelItemCount() == 0 and self.win.SubImageNameTree.topLevelItemCount() == 0:
+            if self.win.AddImageNameTree.model().rowCount() == 0 and self.win.SubImageNameTree.model().rowCount() == 0:
                 
-                self.win.TotalImageNameTree.clear()
+                self.win.TotalImageNameTree.model().clear()
 
             self.win.plot.clear_plot(plot)
 
@@ -233,9 +272,7 @@ class Trees:
 
                     self.win.selection.selected_item()
             
-            image_parameters['Names'] = []
-            image_parameters['Normalization'] = []
-            image_parameters['Accepeted'] = []
+            image_parameters.clear()
             
             self.win.bounds.change_bounds()
 
@@ -246,7 +283,11 @@ class Trees:
         image is the replotted using the new swaped order of operations.
         '''
 
-        self.additive_parameters, self.subtractive_parameters = self.subtractive_parameters.copy(), self.additive_parameters.copy()
+        if self.win.jobs.available(writes = (self.win.AddImageNameTree.model().title, self.win.SubImageNameTree.model().title)) == False:
+
+            return
+
+        self.additive_parameters, self.subtractive_parameters = self.subtractive_parameters, self.additive_parameters
 
         tmp_min, tmp_max = self.win.addStdMinBox.text(), self.win.addStdMaxBox.text()
 
@@ -255,8 +296,8 @@ class Trees:
 
         selected_tree = self.get_tree()
 
-        self.win.AddImageNameTree.clear()
-        self.win.SubImageNameTree.clear()
+        self.win.AddImageNameTree.model().clear()
+        self.win.SubImageNameTree.model().clear()
 
         self.win.plot.clear_plot(self.win.AddPlotView)
         self.win.plot.clear_plot(self.win.SubPlotView)
@@ -303,6 +344,19 @@ class Trees:
 
         return tree
 
+    def loaded_set(self):
+        '''
+        Returns the additive image set if it is loaded, otherwise the
+        subtractive image set. Both sets share the same cycle offsets
+        when loaded together.
+        '''
+
+        if len(self.additive_parameters) != 0:
+
+            return self.additive_parameters
+
+        return self.subtractive_parameters
+
     def remove_corr(self):
         '''
         Item/Image is removed to the multiplictive correction QTreeWidget
@@ -318,45 +372,48 @@ class Trees:
 
             self.multiplicative_parameters['Name'] = None
 
-    def populate_tree(self, tree, fname, bounds):
+    def populate_tree(self, tree, image_set):
         '''
-        Loops through all cycles and images imported from the user
-        and adds their labels to the appropriate QTreeWidget.
+        Shows an image set in a tree. The rows are read from the columns
+        of the set by the model of the tree as they are drawn, so no item
+        is created per image, and every cycle is expanded.
         '''
 
-        tree.clear()
-        for cycle in range(len(fname)):
+        tree.model().set_image_set(image_set)
 
-            tree.addTopLevelItem(QTreeWidgetItem(['Cycle_' + str(cycle)], 0))
-            tree.expandItem(tree.topLevelItem(cycle))
+        for cycle in range(tree.model().rowCount()):
 
-            for row in range(len(fname[cycle])):
+            tree.expand(tree.model().index(cycle, 0))
 
-                tree.topLevelItem(cycle).addChild(QTreeWidgetItem([os.path.basename(fname[cycle][row])], 0))
+    def refresh_tree(self, tree, image_set):
+        '''
+        Updates a tree after the bounds of an image set have changed. If
+        the tree already shows the set with the same cycles, only the
+        images whose acceptance flipped are repainted, otherwise the tree
+        is populated again.
+        '''
 
-                if bounds[cycle][row] == False:
+        if tree.model().image_set is not image_set or tree.model().refresh() == False:
 
-                    tree.topLevelItem(cycle).child(row).setForeground(0, QBrush(QColor('gold')))
+            self.populate_tree(tree, image_set)
 
-                elif bounds[cycle][row] == True:
+    def select_item(self, tree, cycle, item):
+        '''
+        Selects the image row "item" of the cycle row "cycle" of a tree.
+        '''
 
-                    tree.topLevelItem(cycle).child(row).setForeground(0, QBrush(QColor(225, 225, 225, 255)))
+        tree.selectionModel().select(tree.model().index(item, 0, tree.model().index(cycle, 0)), QItemSelectionModel.Select)
 
     def change_cycles(self, image_parameters):
         '''
-        Data is stored as list of arrays, where the number of lists 
-        is equal to the number of desired cycles. When the number of desired 
-        cycles is changed the list of arrays is flattened and then re-chunked
-        into a list of arrays.
+        Data is stored as contiguous columns with the cycles given by
+        offsets into the columns. When the number of desired cycles is
+        changed only the offsets are recalculated and every image is
+        accepted again until the bounds are recalculated.
         '''
 
-        image_parameters['Names'] = np.hstack(image_parameters['Names'])
-        image_parameters['Normalization'] = np.hstack(image_parameters['Normalization'])
-        image_parameters['Accepted'] = np.hstack(image_parameters['Accepted'])
-
-        image_parameters['Accepted'] = np.array_split(np.array([True for _ in range(len(image_parameters['Names']))]), int(self.win.CyclesBox.text()), axis = 0)
-        image_parameters['Names'] = np.array_split(image_parameters['Names'], int(self.win.CyclesBox.text()), axis = 0)
-        image_parameters['Normalization'] = np.array_split(np.array(image_parameters['Normalization']), int(self.win.CyclesBox.text()), axis = 0)
+        image_parameters.set_cycles(int(self.win.CyclesBox.text()))
+        image_parameters.accepted.fill(True)
 
     def update_cycles(self):
         '''
@@ -365,16 +422,54 @@ class Trees:
         of the accepted images and repopulates the QTreeWidgets.
         '''
 
-        if len(self.additive_parameters['Names']) != 0:
+        if len(self.additive_parameters) != 0:
 
             self.change_cycles(self.additive_parameters)
 
-        if len(self.subtractive_parameters['Names']) != 0:
+        if len(self.subtractive_parameters) != 0:
 
             self.change_cycles(self.subtractive_parameters)
 
-        self.update_trees()
         self.win.bounds.change_bounds()
+        self.win.selection.reselect_selected()
+
+    def schedule_update(self, cycles):
+        '''
+        Collects edits of the cycle and drop controls. Every edit restarts
+        the idle timer, so a burst of edits, such as holding a spinbox
+        arrow, runs a single recalculation once the controls settle. A
+        change of cycles is remembered until that recalculation runs.
+        '''
+
+        self.pending_cycles = self.pending_cycles or cycles
+        self.control_timer.start()
+
+    def run_update(self):
+        '''
+        Runs the recalculation collected by schedule_update.
+        '''
+
+        self.control_timer.stop()
+
+        cycles, self.pending_cycles = self.pending_cycles, False
+
+        if cycles == True:
+
+            self.update_cycles()
+
+        else:
+
+            self.win.bounds.change_bounds()
+
+    def flush_update(self):
+        '''
+        Runs a pending recalculation immediately, so work that reads the
+        accepted images never uses bounds older than the controls.
+        '''
+
+        if self.control_timer.isActive() == True:
+
+            self.run_update()
 
     def update_trees(self):
         '''
@@ -383,17 +478,19 @@ class Trees:
         of the normalization data.
         '''
 
-        if len(self.additive_parameters['Names']) != 0:
+        if len(self.additive_parameters) != 0:
 
-            self.populate_tree(self.win.AddImageNameTree, self.additive_parameters['Names'], self.additive_parameters['Accepted'])
-            self.populate_tree(self.win.TotalImageNameTree, np.array_split(np.array(['Image_' + str(i) for i in range(len(np.hstack(self.additive_parameters['Names'])))]), int(self.win.CyclesBox.text())), self.additive_parameters['Accepted'])
-            self.win.plot.update_plot(self.win.AddPlotView, self.additive_parameters['Normalization'], self.additive_parameters['Accepted'], self.win.addStdMinBox, self.win.addStdMaxBox)
+            self.refresh_tree(self.win.AddImageNameTree, self.additive_parameters)
+            self.win.plot.update_plot(self.win.AddPlotView, self.additive_parameters.normalization, self.additive_parameters.accepted, self.win.addStdMinBox, self.win.addStdMaxBox)
 
-        if len(self.subtractive_parameters['Names']) != 0:
+        if len(self.subtractive_parameters) != 0:
             
-            self.populate_tree(self.win.SubImageNameTree, self.subtractive_parameters['Names'], self.subtractive_parameters['Accepted'])
-            self.populate_tree(self.win.TotalImageNameTree, np.array_split(np.array(['Image_' + str(i) for i in range(len(np.hstack(self.subtractive_parameters['Names'])))]), int(self.win.CyclesBox.text())), self.subtractive_parameters['Accepted'])
-            self.win.plot.update_plot(self.win.SubPlotView, self.subtractive_parameters['Normalization'], self.subtractive_parameters['Accepted'], self.win.subStdMinBox, self.win.subStdMaxBox)
+            self.refresh_tree(self.win.SubImageNameTree, self.subtractive_parameters)
+            self.win.plot.update_plot(self.win.SubPlotView, self.subtractive_parameters.normalization, self.subtractive_parameters.accepted, self.win.subStdMinBox, self.win.subStdMaxBox)
+
+        if len(self.loaded_set()) != 0:
+
+            self.refresh_tree(self.win.TotalImageNameTree, self.loaded_set())
 
     def update_rotation(self, slider, rotation_label):
         '''
@@ -426,15 +523,3 @@ class Trees:
             if self.win.pixmapTabs.count() > 1:
                 
                 self.win.traceplot.clear_trace()
-
-    def normalization_factors(self, paths, index):
-        '''
-        From a collection of image paths, load a specific image from 
-        the given "index", then calculate the sum of intensity for that
-        image.
-        '''
-
-        img = self.win.files.load_image(paths[index])
-
-        return (index, np.sum(img[int(np.shape(img)[0] * 0.01) : np.shape(img)[0] - int(np.shape(img)[0] * 0.01), \
-                                  int(np.shape(img)[1] * 0.01) : np.shape(img)[1] - int(np.shape(img)[1] * 0.01)]))
\ No newline at end of file
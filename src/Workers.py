@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+'''
+===================================================================
+Amorphous Toolbox - Image Compiler Tool - Workers
+
+This script owns the long-lived worker pools shared by the whole
+application. Reading images is I/O bound and is given to the I/O
+pool, whose size depends on the storage the images are read from,
+while numerical work is given to the CPU pool.
+
+The size of each pool is taken from the 'ICT_IO_THREADS' and
+'ICT_CPU_WORKERS' environment variables when set, otherwise from
+the user preferences, otherwise from the number of cores. Images
+are compiled on the I/O pool unless a number of compile processes
+is set by 'ICT_COMPILE_PROCESSES' or the user preferences, then a
+pool of that many processes is started for each compile.
+
+Work is streamed through the pools with a fixed number of items
+in flight, so the memory held by completed images waiting for the
+consumer is bounded regardless of the size of the image set.
+
+Author: Nick Burns, January, 20th, 2024
+===================================================================
+'''
+
+import os
+
+from PySide6.QtCore import QSettings
+
+from multiprocessing.pool import ThreadPool as Pool
+from multiprocessing import cpu_count
+
+from src.Engine import imap_bounded
+
+class Workers:
+    '''
+    This class deals with the creation, resizing and shutdown of the
+    application-wide I/O and CPU worker pools.
+    '''
+
+    def __init__(self, win):
+        '''
+        Reads the configured pool sizes and starts the worker pools.
+        '''
+
+        self.win = win
+
+        #=========================================
+        #                  Data
+        #=========================================
+
+        self.settings = QSettings('Amorphous Toolbox', 'Image Compiler Tool')
+
+        self.io_threads = self.limit('ICT_IO_THREADS', 'Workers/IO_Threads', cpu_count())
+        self.cpu_workers = self.limit('ICT_CPU_WORKERS', 'Workers/CPU_Workers', cpu_count())
+        self.compile_processes = self.limit('ICT_COMPILE_PROCESSES', 'Workers/Compile_Processes', 0, 0)
+
+        self.io_pool = Pool(self.io_threads)
+        self.cpu_pool = Pool(self.cpu_workers)
+
+        self.retired_pools = []
+
+    def imap_unordered(self, func, items, pool = None, in_flight = None):
+        '''
+        Bounded replacement of Pool.imap_unordered, yields the results of
+        func(item) in the order they complete. At most "in_flight" items,
+        by default twice the number of I/O threads, are running or waiting
+        for the consumer at any time, a new item is only submitted once a
+        result is taken by the consumer.
+        '''
+
+        pool = self.io_pool if pool is None else pool
+        in_flight = 2 * self.io_threads if in_flight is None else in_flight
+
+        return imap_bounded(pool, func, items, in_flight)
+
+    def cpu_imap(self, func, items):
+        '''
+        Streams numerical work through the CPU pool, as imap_unordered
+        does through the I/O pool, with twice the number of CPU workers
+        in flight.
+        '''
+
+        return self.imap_unordered(func, items, self.cpu_pool, 2 * self.cpu_workers)
+
+    def limit(self, variable, key, default, minimum = 1):
+        '''
+        Returns the size of a pool from its environment variable, the
+        saved user preferences or the given default, in that order.
+        '''
+
+        if os.environ.get(variable, '').strip().isdigit() and int(os.environ[variable]) >= minimum:
+
+            return int(os.environ[variable])
+
+        return max(minimum, int(self.settings.value(key, default)))
+
+    def set_limits(self, io_threads, cpu_workers, compile_processes = 0):
+        '''
+        Saves the pool sizes to the user preferences and replaces the
+        pools whose size has changed, new work is given to the new pools.
+        Running jobs keep giving work to the pools they started with, so
+        the replaced pools are only closed once no job is running. The
+        compile processes are used from the next compile.
+        '''
+
+        self.settings.setValue('Workers/IO_Threads', int(io_threads))
+        self.settings.setValue('Workers/CPU_Workers', int(cpu_workers))
+        self.settings.setValue('Workers/Compile_Processes', int(compile_processes))
+
+        self.compile_processes = int(compile_processes)
+
+        if int(io_threads) != self.io_threads:
+
+            self.retired_pools.append(self.io_pool)
+            self.io_threads = int(io_threads)
+            self.io_pool = Pool(self.io_threads)
+
+        if int(cpu_workers) != self.cpu_workers:
+
+            self.retired_pools.append(self.cpu_pool)
+            self.cpu_workers = int(cpu_workers)
+            self.cpu_pool = Pool(self.cpu_workers)
+
+        self.retire_pools()
+
+    def retire_pools(self):
+        '''
+        Closes the replaced pools once no job is running, their remaining
+        work is allowed to finish. Called again as each job finishes.
+        '''
+
+        if len(self.win.jobs.running) == 0:
+
+            for pool in self.retired_pools:
+
+                pool.close()
+
+            self.retired_pools = []
+
+    def close(self):
+        '''
+        Stops accepting work and waits for the worker pools to finish.
+        '''
+
+        for pool in [self.io_pool, self.cpu_pool] + self.retired_pools:
+
+            pool.close()
+            pool.join()
@@ -1,9 +1,29 @@
-from src import Canvas
-from src.Bounds import Bounds
-from src.Files import Files
-from src.Plots import Image
-from src.Plots import Plot
-from src.Plots import Trace
-from src.Trees import Trees
-from src.Selection import Selection
-from src.Messaging import Messaging
\ No newline at end of file
+import importlib
+
+#GUI modules and classes of the application, they are imported on
+#first use so that the Qt-free modules of the package (Sets, Engine,
+#Statistics, Cache, Tiff, Display) can be imported without PySide6.
+GUI = {'Canvas': ('src.Canvas', None),
+       'Bounds': ('src.Bounds', 'Bounds'),
+       'Files': ('src.Files', 'Files'),
+       'Image': ('src.Plots', 'Image'),
+       'Plot': ('src.Plots', 'Plot'),
+       'Trace': ('src.Plots', 'Trace'),
+       'Trees': ('src.Trees', 'Trees'),
+       'Selection': ('src.Selection', 'Selection'),
+       'Messaging': ('src.Messaging', 'Messaging'),
+       'Workers': ('src.Workers', 'Workers'),
+       'Jobs': ('src.Jobs', 'Jobs')}
+
+def __getattr__(name):
+
+    if name not in GUI:
+
+        raise AttributeError("module 'src' has no attribute '" + name + "'")
+
+    module = importlib.import_module(GUI[name][0])
+    value = module if GUI[name][1] is None else getattr(module, GUI[name][1])
+
+    globals()[name] = value
+
+    return value
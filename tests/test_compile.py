@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+==============================================================
+     Amorphous Toolbox - Image Compiler Tool - Compile Tests
+==============================================================
+Compiles small synthetic image sets written to a temporary folder
+and checks the thread, process and sharded compiles against a
+reference sum of the images.
+==============================================================
+'''
+
+import os
+import sys
+import json
+import numpy as np
+import pytest
+
+pytest.importorskip('skimage')
+tifffile = pytest.importorskip('tifffile')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Image_Compiler_CLI as cli
+from src.Cache import statistics_cache
+from src.Sets import ImageSet
+from src.Engine import set_statistics, normalize_set, bound_sets, compile_parameters, compile_sets, merge_partials
+
+#Number of images of each set, cycles and shape of the images
+IMAGES = 12
+CYCLES = 3
+SHAPE = (16, 12)
+
+@pytest.fixture
+def images(tmp_path, monkeypatch):
+    '''
+    Writes the additive and subtractive images and the multiplicative
+    correction, the statistics cache is kept within the temporary folder.
+    '''
+
+    monkeypatch.setattr(statistics_cache, 'path', str(tmp_path / 'cache' / 'statistics.sqlite'))
+    monkeypatch.setattr(statistics_cache, 'connection', None)
+
+    rng = np.random.default_rng(0)
+
+    for folder in ('add', 'sub'):
+
+        os.makedirs(tmp_path / folder)
+
+    for index in range(IMAGES):
+
+        tifffile.imwrite(str(tmp_path / 'add' / ('a_%03d.tif' % index)), rng.poisson(100, SHAPE).astype(np.uint16))
+        tifffile.imwrite(str(tmp_path / 'sub' / ('s_%03d.tif' % index)), rng.poisson(20, SHAPE).astype(np.uint16))
+
+    tifffile.imwrite(str(tmp_path / 'mul.tif'), rng.uniform(0.5, 1.5, SHAPE))
+
+    yield tmp_path
+
+    if statistics_cache.connection:
+
+        statistics_cache.connection.close()
+
+def load_sets(folder):
+    '''
+    Loads the additive and subtractive sets, accepting every image.
+    '''
+
+    image_sets = []
+
+    for name in ('add', 'sub'):
+
+        image_set = ImageSet(sorted(str(folder / name / image) for image in os.listdir(folder / name)), CYCLES)
+        normalize_set(image_set, set_statistics(image_set.names))
+
+        image_sets.append(image_set)
+
+    bound_sets(image_sets[0], image_sets[1], 0, 0, (100, 100), (100, 100))
+
+    return image_sets
+
+def write_manifest(folder, output):
+    '''
+    Writes a manifest compiling the total and cycle images to "output".
+    '''
+
+    path = folder / (output + '.json')
+
+    with open(path, 'w') as manifest_file:
+
+        json.dump({'additive': 'add/*.tif', 'subtractive': 'sub/*.tif', 'multiplicative': 'mul.tif', 'cycles': CYCLES,
+                   'std_bounds': {'additive': [100, 100], 'subtractive': [100, 100]},
+                   'output': {'folder': output, 'name': 'Compiled', 'cycles': True}}, manifest_file)
+
+    return str(path)
+
+def assert_same_images(first, second):
+    '''
+    Checks that two output folders hold the same compiled images.
+    '''
+
+    assert sorted(os.listdir(first)) == sorted(os.listdir(second))
+
+    for name in os.listdir(first):
+
+        np.testing.assert_allclose(tifffile.imread(str(first / name)), tifffile.imread(str(second / name)), rtol = 1e-5)
+
+def test_compile_sets_matches_reference_sum(images):
+
+    add_set, sub_set = load_sets(images)
+    mul_img = tifffile.imread(str(images / 'mul.tif'))
+
+    add_names, sub_names, compile_norms, compile_cycles = compile_parameters(add_set, sub_set)
+
+    assert compile_sets(add_set, sub_set, 0, 0, mul_img, str(images / 'Compiled'), True, True) == IMAGES
+
+    frames = np.array([tifffile.imread(add).astype(float) - tifffile.imread(sub) for add, sub in zip(add_names, sub_names)])
+    frames /= compile_norms[:, None, None]
+
+    total = np.sum(frames, axis = 0) * np.average(compile_norms) / mul_img
+
+    np.testing.assert_allclose(tifffile.imread(str(images / 'Compiled.tiff')), total, rtol = 1e-5)
+
+    for cycle in range(CYCLES):
+
+        in_cycle = compile_cycles == cycle
+        cycle_img = np.sum(frames[in_cycle], axis = 0) * np.average(compile_norms[in_cycle]) / mul_img
+
+        np.testing.assert_allclose(tifffile.imread(str(images / ('Compiled_Cycle_' + str(cycle) + '.tiff'))), cycle_img, rtol = 1e-5)
+
+def test_cli_processes_match_threads(images):
+
+    assert cli.main([write_manifest(images, 'threads'), '-j', '2']) == 0
+    assert cli.main([write_manifest(images, 'processes'), '-j', '2', '-p', '2']) == 0
+
+    assert_same_images(images / 'threads', images / 'processes')
+
+def test_cli_merged_shards_match_single_run(images):
+
+    assert cli.main([write_manifest(images, 'single'), '-j', '2']) == 0
+
+    manifest = write_manifest(images, 'shards')
+
+    for shard in range(2):
+
+        assert cli.main([manifest, '-j', '2', '--shard', str(shard) + '/2']) == 0
+
+    partials = [str(images / 'shards' / ('Compiled_Part_' + str(shard) + '.npz')) for shard in range(2)]
+
+    assert cli.main(['--merge'] + partials) == 0
+
+    for partial_result in partials:
+
+        os.remove(partial_result)
+
+    assert_same_images(images / 'single', images / 'shards')
+
+@pytest.fixture
+def partials(images):
+    '''
+    Compiles the partial results of every shard of a three shard compile.
+    '''
+
+    manifest = write_manifest(images, 'shards')
+
+    for shard in range(3):
+
+        assert cli.main([manifest, '-j', '2', '--shard', str(shard) + '/3']) == 0
+
+    return [str(images / 'shards' / ('Compiled_Part_' + str(shard) + '.npz')) for shard in range(3)]
+
+def test_merge_rejects_missing_shard(partials):
+
+    with pytest.raises(ValueError, match = 'missing'):
+
+        merge_partials(partials[:2])
+
+def test_merge_rejects_duplicate_shard(partials):
+
+    with pytest.raises(ValueError, match = 'more than once'):
+
+        merge_partials([partials[0], partials[0], partials[2]])
+
+    assert cli.main(['--merge', partials[0], partials[0], partials[2]]) == 1